@@ -1,6 +1,8 @@
 import os
 import sys
-from flask import Flask
+import threading
+import time
+from flask import Flask, request
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_limiter import Limiter
@@ -11,6 +13,7 @@ if PARENT_DIR not in sys.path:
     sys.path.append(PARENT_DIR)
 
 from backend.models.user import db
+from backend.utils.db import use_replica, configure_sqlite
 from backend.routes.auth import auth_bp
 from backend.routes.user import user_bp
 from backend.routes.chat import chat_bp
@@ -21,18 +24,71 @@ from flask_socketio import SocketIO
 from backend.config import Config
 # flake8: noqa
 
+def warm_up_dependencies():
+    """Create the SDK clients that are otherwise built on first use"""
+    from backend.services.chat_service import get_client
+    from backend.services.prompt_builder import count_tokens
+    from backend.utils.auth import _get_client
+    from backend.utils.pinecone import get_index, get_local_store, _use_pinecone, _use_local
+
+    started = time.perf_counter()
+    steps = [("tokenizer", lambda: count_tokens("warm up"))]
+    if os.getenv("OPENAI_API_KEY"):
+        steps.append(("openai", lambda: (get_client(), _get_client(os.getenv("OPENAI_API_KEY")))))
+    if _use_pinecone():
+        steps.append(("pinecone", get_index))
+    if _use_local():
+        steps.append(("local vector store", get_local_store))
+    for name, step in steps:
+        try:
+            step()
+        except Exception as e:
+            print(f"Warm-up of {name} failed: {e}")
+    print(f"Dependencies warmed up in {time.perf_counter() - started:.2f}s")
+
+
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
     db.init_app(app)
-    CORS(app)
+    configure_sqlite(app)
+
+    # Bring the schema up to date (replaces db.create_all())
+    if os.getenv("AUTO_MIGRATE", "1") == "1":
+        from backend.migrations import upgrade
+        with app.app_context():
+            upgrade(db.engine)
+    # Paged list endpoints return the next cursor in a header
+    CORS(app, expose_headers=["X-Next-Cursor"])
     JWTManager(app)
     Limiter(get_remote_address, app=app, default_limits=["60/minute", "1000/day"])
 
+    @app.before_request
+    def route_reads():
+        # Whitelisted read-only endpoints read from the replica; everything else stays on the primary
+        if request.method in ("GET", "HEAD") and request.endpoint in app.config["READ_REPLICA_ENDPOINTS"]:
+            use_replica()
+
     @app.get('/api/health')
     def health():
-        return {"status": "ok"}
+        from backend.utils.stage_executor import stage_stats
+        from backend.utils.resilience import breaker_states
+        from backend.utils.singleflight import singleflight_stats
+        from backend.services.index_queue import queue_stats
+        from backend.services.community_counters import counter_buffer
+        try:
+            index_queue = queue_stats()
+        except Exception as e:
+            index_queue = {"error": str(e)}
+        return {
+            "status": "ok",
+            "circuit_breakers": breaker_states(),
+            "singleflight": singleflight_stats(),
+            "retrieval_stages": stage_stats(),
+            "counter_buffer": counter_buffer.stats(),
+            "index_queue": index_queue
+        }
     
     @app.get('/')
     def root():
@@ -63,13 +119,28 @@ def create_app():
     from backend.socketio_handler import register_handlers
     register_handlers(socketio)
 
+    # Drain the mood index queue from a thread of this process; only the web entry point below
+    # turns it on by default, so scripts and backend/index_worker.py never start a second worker
+    if os.getenv("INDEX_WORKER_IN_PROCESS", "0") == "1":
+        from backend.services.index_queue import start_background_worker
+        start_background_worker(app)
+
+    # Like/comment counter deltas are coalesced in memory and written on a timer
+    from backend.services.community_counters import FLUSH_INTERVAL_MS, start_counter_flusher
+    if FLUSH_INTERVAL_MS > 0:
+        start_counter_flusher(app)
+
+    # SDK clients are lazy; optionally build them in the background so the first request doesn't pay
+    if os.getenv("WARMUP_ON_START", "0") == "1":
+        threading.Thread(target=warm_up_dependencies, name="warm-up", daemon=True).start()
+
     return app, socketio
 
 
 if __name__ == '__main__':
+    # Single-process deploys (Railway) have no separate index worker
+    os.environ.setdefault("INDEX_WORKER_IN_PROCESS", "1")
     flask_app, socketio_instance = create_app()
-    with flask_app.app_context():
-        db.create_all()
     
     # Run with proper configuration for SocketIO
     port = int(os.environ.get('PORT', 5001))
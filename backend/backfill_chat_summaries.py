@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Recompute the message summary columns of every chat session.
+
+Migration 0003 runs this once when it adds the columns. Run it again if
+messages were ever written without going through ChatSession.record_messages.
+
+    python backend/backfill_chat_summaries.py [--batch-size 500]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PARENT_DIR = os.path.dirname(CURRENT_DIR)
+if PARENT_DIR not in sys.path:
+    sys.path.append(PARENT_DIR)
+
+from backend.models.user import db
+from backend.services.chat_summaries import backfill_session_summaries
+from backend.app import create_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute chat session message summaries")
+    parser.add_argument("--batch-size", type=int, default=500, help="Sessions updated per statement batch")
+    args = parser.parse_args()
+
+    app, _ = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        with db.engine.begin() as connection:
+            updated = backfill_session_summaries(connection, batch_size=args.batch_size)
+        print(f"Updated {updated} chat sessions in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
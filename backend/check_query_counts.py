@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Query-count check for the community feed and post thread endpoints.
+
+Seeds a scratch SQLite database with posts, threaded comments and a distinct
+author per comment, then counts the SQL statements each endpoint runs. Fails
+when an endpoint runs more than its budget or when the count grows with the
+amount of data (an N+1 regression).
+
+    python backend/check_query_counts.py [--posts 50] [--comments 20]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+# Add parent directory to path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PARENT_DIR = os.path.dirname(CURRENT_DIR)
+if PARENT_DIR not in sys.path:
+    sys.path.append(PARENT_DIR)
+
+os.environ["INDEX_WORKER_IN_PROCESS"] = "0"
+os.environ["WARMUP_ON_START"] = "0"
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from backend.config import Config
+from backend.models.user import db, User, CommunityPost, PostComment
+from backend.routes import community
+from backend.app import create_app
+
+# Most statements each endpoint may run, whatever the number of posts, comments and authors
+QUERY_BUDGETS = {
+    "feed page": 2,  # the page with its authors, the feed size
+    "post thread": 2,  # the post with its author, every comment with its author
+}
+
+
+def build_app(path):
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+    Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+    Config.SQLALCHEMY_BINDS = {}
+    Config.RATELIMIT_ENABLED = False
+    app, _ = create_app()
+    return app
+
+
+def seed(posts, comments):
+    """`posts` posts, each with `comments` top-level comments that have one reply; returns a post id"""
+    authors = [
+        User(email=f"author{i}@example.com", password_hash="-", display_name=f"Author {i}")
+        for i in range(max(posts, comments * 2))
+    ]
+    db.session.add_all(authors)
+    db.session.flush()
+    post_ids = []
+    for p in range(posts):
+        post = CommunityPost(user_id=authors[p].id, title=f"Post {p}", content="Seeded post",
+                             comments_count=comments * 2)
+        db.session.add(post)
+        db.session.flush()
+        post_ids.append(post.id)
+        for c in range(comments):
+            comment = PostComment(post_id=post.id, user_id=authors[2 * c].id, content=f"Comment {c}")
+            db.session.add(comment)
+            db.session.flush()
+            db.session.add(PostComment(post_id=post.id, user_id=authors[2 * c + 1].id,
+                                       parent_id=comment.id, content=f"Reply {c}"))
+    db.session.commit()
+    return post_ids[0], authors[0].id
+
+
+def count_queries(app, client, headers, path):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # Measure the uncached path: the feed size is otherwise cached between requests
+    community._feed_totals.clear()
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(path, headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    if response.status_code != 200:
+        raise SystemExit(f"GET {path} returned {response.status_code}")
+    return len(statements)
+
+
+def measure(posts, comments):
+    """Statements per endpoint against a fresh database of the given size"""
+    app = build_app(os.path.join(tempfile.mkdtemp(prefix="query-count-"), "queries.db"))
+    with app.app_context():
+        post_id, user_id = seed(posts, comments)
+        headers = {"Authorization": f"Bearer {create_access_token(identity=str(user_id))}"}
+    client = app.test_client()
+    return {
+        "feed page": count_queries(app, client, headers, f"/api/community/posts?per_page={posts}"),
+        "post thread": count_queries(app, client, headers, f"/api/community/posts/{post_id}"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the community endpoints run a bounded number of queries")
+    parser.add_argument("--posts", type=int, default=50)
+    parser.add_argument("--comments", type=int, default=20)
+    args = parser.parse_args()
+
+    small = measure(2, 1)
+    large = measure(args.posts, args.comments)
+    failures = 0
+    for name, budget in QUERY_BUDGETS.items():
+        ok = large[name] <= budget and large[name] == small[name]
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {small[name]} queries with 2 posts, "
+              f"{large[name]} with {args.posts} posts x {args.comments * 2} comments (budget {budget})")
+    if failures:
+        print(f"{failures} endpoints exceed their query budget")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,10 +3,57 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def database_url(url):
+    """Normalize provider-style URLs to the SQLAlchemy driver names we ship"""
+    if url.startswith("mysql://"):
+        # PyMySQL is the driver in requirements.txt
+        return "mysql+pymysql://" + url[len("mysql://"):]
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def engine_options(url):
+    """Connection pool settings for the given backend"""
+    if url.startswith("sqlite"):
+        # SQLite has no server to lose connections to, and pool sizing does not apply to its file locks
+        return {}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "10")),
+        # Check connections before use and recycle them before MySQL's wait_timeout drops them
+        "pool_pre_ping": True,
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "280")),
+    }
+
+
+def replica_binds(url):
+    """SQLALCHEMY_BINDS entry for the read replica, if one is configured"""
+    if not url:
+        return {}
+    url = database_url(url)
+    return {"replica": dict(engine_options(url), url=url)}
+
+
 class Config:
     SECRET_KEY = os.getenv("JWT_SECRET_KEY", "mental-wellness-secret-key-2024")
-    # Force SQLite for development
-    SQLALCHEMY_DATABASE_URI = "sqlite:///mental_wellness.db"
+    # SQLite unless DATABASE_URL (or MYSQL_URL) points at a server
+    SQLALCHEMY_DATABASE_URI = database_url(
+        os.getenv("DATABASE_URL") or os.getenv("MYSQL_URL") or "sqlite:///mental_wellness.db"
+    )
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_BINDS = replica_binds(os.getenv("DATABASE_REPLICA_URL"))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # WAL, mmap and busy-timeout pragmas on SQLite connections (see utils/db.py)
+    SQLITE_TUNING = os.getenv("SQLITE_TUNING", "1") == "1"
+    # Read-only endpoints whose queries may go to the replica
+    READ_REPLICA_ENDPOINTS = set(
+        os.getenv(
+            "READ_REPLICA_ENDPOINTS",
+            "chat_history.get_chat_sessions,community.get_posts,user.get_moods,user.get_mood_trends"
+        ).split(",")
+    )
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "mental-wellness-secret-key-2024")
-    JWT_ACCESS_TOKEN_EXPIRES = 7200
\ No newline at end of file
+    JWT_ACCESS_TOKEN_EXPIRES = 7200
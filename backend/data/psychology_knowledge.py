@@ -1,5 +1,7 @@
 # Psychology Knowledge Base for Mental Wellness Assistant
 # Based on evidence-based psychological principles and therapeutic approaches
+from functools import lru_cache
+
 
 PSYCHOLOGY_KNOWLEDGE = {
     "anxiety": {
@@ -166,30 +168,94 @@ PSYCHOLOGY_KNOWLEDGE = {
     }
 }
 
-def get_psychology_context(keywords):
-    """Extract relevant psychology knowledge based on keywords"""
-    context = []
-    
+# Mental health and psychology keywords looked for in user messages
+PSYCHOLOGY_KEYWORDS = [
+    'anxiety', 'depression', 'stress', 'worry', 'nervous', 'panic', 'fear',
+    'sad', 'hopeless', 'worthless', 'empty', 'lonely', 'isolated',
+    'angry', 'irritated', 'frustrated', 'overwhelmed', 'burnout',
+    'sleep', 'insomnia', 'fatigue', 'tired', 'exhausted',
+    'concentration', 'focus', 'memory', 'confused', 'scattered',
+    'relationships', 'social', 'friends', 'family', 'communication',
+    'work', 'job', 'career', 'performance', 'deadline', 'pressure',
+    'mindfulness', 'meditation', 'breathing', 'relaxation', 'calm',
+    'therapy', 'counseling', 'treatment', 'help', 'support',
+    'self-care', 'wellness', 'mental health', 'emotional', 'feelings',
+    'thoughts', 'thinking', 'rumination', 'overthinking', 'negative',
+    'positive', 'gratitude', 'happiness', 'joy', 'contentment',
+    'trauma', 'ptsd', 'grief', 'loss', 'bereavement', 'crisis'
+]
+
+# Lowercased searchable text of each topic, built once
+_TOPIC_TEXT = {
+    topic: [topic] + [str(value).lower() for value in knowledge.values() if isinstance(value, (str, list))]
+    for topic, knowledge in PSYCHOLOGY_KNOWLEDGE.items()
+}
+
+
+def _topics_containing(term):
+    return tuple(
+        topic for topic, parts in _TOPIC_TEXT.items()
+        if any(term in part for part in parts)
+    )
+
+
+# Inverted index: term -> topics whose name or content mentions it
+TERM_TOPICS = {term: _topics_containing(term) for term in PSYCHOLOGY_KEYWORDS}
+
+
+def topics_for_term(term):
+    topics = TERM_TOPICS.get(term)
+    if topics is None:
+        topics = _topics_containing(term)
+        if len(TERM_TOPICS) < 4096:
+            TERM_TOPICS[term] = topics
+    return topics
+
+
+@lru_cache(maxsize=1024)
+def _render_blocks(keywords):
+    blocks = []
+    seen_topics = set()
+
     for keyword in keywords:
         keyword_lower = keyword.lower()
-        
+
         # Direct matches
         if keyword_lower in PSYCHOLOGY_KNOWLEDGE:
             knowledge = PSYCHOLOGY_KNOWLEDGE[keyword_lower]
-            context.append(f"Psychology knowledge about {keyword_lower}:")
-            context.append(f"Definition: {knowledge.get('definition', 'N/A')}")
-            
+            lines = [
+                f"Psychology knowledge about {keyword_lower}:",
+                f"Definition: {knowledge.get('definition', 'N/A')}"
+            ]
             if 'techniques' in knowledge:
-                context.append(f"Evidence-based techniques: {', '.join(knowledge['techniques'])}")
+                lines.append(f"Evidence-based techniques: {', '.join(knowledge['techniques'])}")
             if 'coping_strategies' in knowledge:
-                context.append(f"Coping strategies: {', '.join(knowledge['coping_strategies'])}")
+                lines.append(f"Coping strategies: {', '.join(knowledge['coping_strategies'])}")
             if 'when_to_seek_help' in knowledge:
-                context.append(f"When to seek professional help: {knowledge['when_to_seek_help']}")
-        
+                lines.append(f"When to seek professional help: {knowledge['when_to_seek_help']}")
+            blocks.append((keyword_lower, 'direct', tuple(lines)))
+            seen_topics.add(keyword_lower)
+
         # Partial matches
-        for topic, knowledge in PSYCHOLOGY_KNOWLEDGE.items():
-            if keyword_lower in topic or any(keyword_lower in str(value).lower() for value in knowledge.values() if isinstance(value, (str, list))):
-                if topic not in [c.split(':')[0].split()[-1] for c in context]:
-                    context.append(f"Related psychology topic - {topic}: {knowledge.get('definition', 'N/A')}")
-    
-    return context
+        for topic in topics_for_term(keyword_lower):
+            if topic not in seen_topics:
+                knowledge = PSYCHOLOGY_KNOWLEDGE[topic]
+                line = f"Related psychology topic - {topic}: {knowledge.get('definition', 'N/A')}"
+                blocks.append((topic, 'related', (line,)))
+                seen_topics.add(topic)
+
+    return tuple(blocks)
+
+
+def get_psychology_blocks(keywords):
+    """Knowledge for the keywords as (topic, 'direct' or 'related', lines) blocks"""
+    return list(_render_blocks(tuple(keywords)))
+
+
+def flatten_blocks(blocks):
+    return [line for _, _, lines in blocks for line in lines]
+
+
+def get_psychology_context(keywords):
+    """Extract relevant psychology knowledge based on keywords"""
+    return flatten_blocks(_render_blocks(tuple(keywords)))
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Mood index worker.
+
+Runs the embedding + vector upsert/delete jobs that the mood endpoints
+enqueue, with batching, retries and exponential backoff.
+
+    python backend/index_worker.py [--batch-size 100] [--once]
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PARENT_DIR = os.path.dirname(CURRENT_DIR)
+if PARENT_DIR not in sys.path:
+    sys.path.append(PARENT_DIR)
+
+from backend.services.index_queue import run_worker, queue_stats
+from backend.app import create_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process queued mood index jobs")
+    parser.add_argument("--batch-size", type=int, default=100, help="Jobs claimed per batch")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to sleep when idle")
+    parser.add_argument("--once", action="store_true", help="Drain the queue and exit")
+    args = parser.parse_args()
+
+    app, _ = create_app()
+    with app.app_context():
+        print(f"Index worker started, queue: {queue_stats()}")
+        run_worker(batch_size=args.batch_size, poll_interval=args.poll_interval, once=args.once)
+        print(f"Index worker stopped, queue: {queue_stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Database schema migrations.
+
+    python backend/migrate.py status          # applied and pending migrations
+    python backend/migrate.py upgrade         # apply pending migrations
+    python backend/migrate.py check-indexes   # EXPLAIN the hot queries, fail on missing indexes
+"""
+
+import argparse
+import os
+import sys
+from datetime import date
+
+# Add parent directory to path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PARENT_DIR = os.path.dirname(CURRENT_DIR)
+if PARENT_DIR not in sys.path:
+    sys.path.append(PARENT_DIR)
+
+# Migrations are run explicitly by this command
+os.environ["AUTO_MIGRATE"] = "0"
+
+from backend.models.user import (
+    db, MoodEntry, ChatSession, ChatMessage, CommunityPost, PostComment,
+    CoachingSession, CoachingMessage
+)
+from backend.migrations import load_migrations, applied_versions, upgrade
+from backend.app import create_app
+
+
+def hot_queries():
+    """(description, expected index, query) for the queries the routes run on every request"""
+    return [
+        ("moods by user", "ix_mood_entry_user_timestamp",
+         MoodEntry.query.filter_by(user_id=1).order_by(MoodEntry.timestamp.desc())),
+        ("chat sessions by user", "ix_chat_session_user_date",
+         ChatSession.query.filter_by(user_id=1).order_by(ChatSession.date.desc())),
+        ("today's chat session", "ix_chat_session_user_date",
+         ChatSession.query.filter_by(user_id=1, date=date.today())),
+        ("recent chat sessions", "ix_chat_session_user_updated",
+         ChatSession.query.filter_by(user_id=1).order_by(ChatSession.updated_at.desc()).limit(5)),
+        ("chat messages of a session", "ix_chat_message_session_created",
+         ChatMessage.query.filter_by(session_id=1).order_by(ChatMessage.created_at.asc())),
+        ("feed, newest", "ix_community_post_created",
+         CommunityPost.query.order_by(CommunityPost.created_at.desc()).limit(10)),
+        ("feed, most liked", "ix_community_post_likes",
+         CommunityPost.query.order_by(CommunityPost.likes_count.desc(), CommunityPost.created_at.desc()).limit(10)),
+        ("feed, most discussed", "ix_community_post_comments",
+         CommunityPost.query.order_by(CommunityPost.comments_count.desc(), CommunityPost.created_at.desc()).limit(10)),
+        ("feed, hot", "ix_community_post_hot",
+         CommunityPost.query.order_by(CommunityPost.hot_score.desc(), CommunityPost.created_at.desc()).limit(10)),
+        ("category feed, newest", "ix_community_post_category_created",
+         CommunityPost.query.filter_by(category="support").order_by(CommunityPost.created_at.desc()).limit(10)),
+        ("category feed, most liked", "ix_community_post_category_likes",
+         CommunityPost.query.filter_by(category="support")
+         .order_by(CommunityPost.likes_count.desc(), CommunityPost.created_at.desc()).limit(10)),
+        ("category feed, most discussed", "ix_community_post_category_comments",
+         CommunityPost.query.filter_by(category="support")
+         .order_by(CommunityPost.comments_count.desc(), CommunityPost.created_at.desc()).limit(10)),
+        ("category feed, hot", "ix_community_post_category_hot",
+         CommunityPost.query.filter_by(category="support")
+         .order_by(CommunityPost.hot_score.desc(), CommunityPost.created_at.desc()).limit(10)),
+        ("comments of a post", "ix_post_comment_post_created",
+         PostComment.query.filter_by(post_id=1).order_by(PostComment.created_at.asc())),
+        ("coaching sessions as coach", "ix_coaching_session_coach_created",
+         CoachingSession.query.filter_by(coach_id=1).order_by(CoachingSession.created_at.desc())),
+        ("coaching sessions as client", "ix_coaching_session_client_created",
+         CoachingSession.query.filter_by(client_id=1).order_by(CoachingSession.created_at.desc())),
+        ("coaching messages of a session", "ix_coaching_message_session_created",
+         CoachingMessage.query.filter_by(session_id=1).order_by(CoachingMessage.created_at.asc())),
+    ]
+
+
+def explain(query):
+    engine = db.engine
+    sql = str(query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN" if engine.dialect.name == "sqlite" else "EXPLAIN"
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"{prefix} {sql}").fetchall()
+    return " | ".join(" ".join(str(value) for value in row) for row in rows)
+
+
+def check_indexes():
+    failures = 0
+    for description, index_name, query in hot_queries():
+        plan = explain(query)
+        ok = index_name in plan
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {description}: {plan}")
+    if failures:
+        print(f"{failures} queries do not use their index")
+        sys.exit(1)
+
+
+def status():
+    applied = applied_versions(db.engine)
+    for version, description, _ in load_migrations():
+        print(f"{'applied' if version in applied else 'pending'}  {version}  {description}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage database schema migrations")
+    parser.add_argument("command", choices=["status", "upgrade", "check-indexes"])
+    args = parser.parse_args()
+
+    app, _ = create_app()
+    with app.app_context():
+        if args.command == "status":
+            status()
+        elif args.command == "upgrade":
+            applied = upgrade(db.engine)
+            print(f"{len(applied)} migrations applied")
+        else:
+            check_indexes()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Schema migrations, applied in order by create_app().
+
+Each migration is a module named mNNNN_<description>.py in this package with
+an upgrade(connection) function. Applied versions are recorded in the
+schema_migrations table. A migration carries frozen copies of the tables,
+columns and backfill SQL it needs instead of importing the models or services,
+so it does the same thing whenever it runs. Operations are idempotent (see
+ops.py) because databases created before migrations may already have them.
+"""
+
+import importlib
+import pkgutil
+from datetime import datetime
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select
+from sqlalchemy.exc import IntegrityError
+
+# Kept out of db.metadata so create_all()/drop_all() never touch it
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("version", String(16), primary_key=True),
+    Column("description", String(200)),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def load_migrations():
+    """(version, description, module) for every migration in this package, in order"""
+    migrations = []
+    for info in pkgutil.iter_modules(__path__):
+        name = info.name
+        if not (name.startswith("m") and name[1:5].isdigit()):
+            continue
+        module = importlib.import_module(f"{__name__}.{name}")
+        migrations.append((name[1:5], name[6:].replace("_", " "), module))
+    return sorted(migrations, key=lambda migration: migration[0])
+
+
+def applied_versions(engine):
+    _metadata.create_all(engine)
+    with engine.connect() as connection:
+        return {row[0] for row in connection.execute(select(schema_migrations.c.version))}
+
+
+def pending_migrations(engine):
+    applied = applied_versions(engine)
+    return [m for m in load_migrations() if m[0] not in applied]
+
+
+def upgrade(engine):
+    """Apply pending migrations, each in its own transaction; returns the versions applied"""
+    done = []
+    for version, description, module in pending_migrations(engine):
+        try:
+            with engine.begin() as connection:
+                module.upgrade(connection)
+                connection.execute(schema_migrations.insert().values(
+                    version=version, description=description, applied_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Another process recorded this version first
+            continue
+        print(f"Applied migration {version}: {description}")
+        done.append(version)
+    return done
@@ -0,0 +1,136 @@
+"""Create any tables that do not exist yet (the schema db.create_all() used to build)"""
+
+from sqlalchemy import (
+    Boolean, Column, Date, DateTime, ForeignKey, Index, Integer, MetaData, String, Table, Text, UniqueConstraint
+)
+
+# The tables as they were when migrations were introduced
+metadata = MetaData()
+
+Table(
+    "user", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("email", String(120), unique=True, nullable=False),
+    Column("password_hash", String(128), nullable=False),
+    Column("role", String(20)),
+    Column("display_name", String(100)),
+    Column("bio", Text),
+    Column("is_verified_coach", Boolean),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "mood_entry", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+    Column("level", String(20)),
+    Column("note", Text),
+    Column("timestamp", DateTime),
+)
+
+Table(
+    "mood_index_job", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("mood_id", Integer, nullable=False),
+    Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+    Column("action", String(20), nullable=False),
+    Column("status", String(20), nullable=False),
+    Column("attempts", Integer, nullable=False),
+    Column("last_error", Text),
+    Column("run_after", DateTime, nullable=False),
+    Column("locked_at", DateTime),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Index("ix_mood_index_job_status_run_after", "status", "run_after"),
+)
+
+Table(
+    "community_post", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+    Column("title", String(200), nullable=False),
+    Column("content", Text, nullable=False),
+    Column("category", String(50)),
+    Column("is_anonymous", Boolean),
+    Column("likes_count", Integer),
+    Column("comments_count", Integer),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+Table(
+    "post_comment", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("post_id", Integer, ForeignKey("community_post.id"), nullable=False),
+    Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+    Column("content", Text, nullable=False),
+    Column("parent_id", Integer, ForeignKey("post_comment.id")),
+    Column("likes_count", Integer),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "post_like", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("post_id", Integer, ForeignKey("community_post.id"), nullable=False),
+    Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+    Column("created_at", DateTime),
+    UniqueConstraint("post_id", "user_id", name="unique_post_like"),
+)
+
+Table(
+    "comment_like", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("comment_id", Integer, ForeignKey("post_comment.id"), nullable=False),
+    Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+    Column("created_at", DateTime),
+    UniqueConstraint("comment_id", "user_id", name="unique_comment_like"),
+)
+
+Table(
+    "coaching_session", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("client_id", Integer, ForeignKey("user.id"), nullable=False),
+    Column("coach_id", Integer, ForeignKey("user.id"), nullable=False),
+    Column("title", String(200), nullable=False),
+    Column("description", Text),
+    Column("status", String(20)),
+    Column("scheduled_at", DateTime),
+    Column("duration_minutes", Integer),
+    Column("notes", Text),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+Table(
+    "coaching_message", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("session_id", Integer, ForeignKey("coaching_session.id"), nullable=False),
+    Column("sender_id", Integer, ForeignKey("user.id"), nullable=False),
+    Column("content", Text, nullable=False),
+    Column("message_type", String(20)),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "chat_session", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+    Column("title", String(200), nullable=False),
+    Column("date", Date, nullable=False),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+Table(
+    "chat_message", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("session_id", Integer, ForeignKey("chat_session.id"), nullable=False),
+    Column("content", Text, nullable=False),
+    Column("message_type", String(20)),
+    Column("created_at", DateTime),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(bind=connection)
@@ -0,0 +1,44 @@
+"""Composite indexes for the per-user, per-session and feed queries"""
+
+from sqlalchemy import Column, Index, MetaData, Table
+from backend.migrations.ops import create_index
+
+metadata = MetaData()
+
+
+def _table(name, *columns):
+    # Just the indexed columns; the index DDL needs nothing else
+    return Table(name, metadata, *(Column(column) for column in columns))
+
+
+mood_entry = _table("mood_entry", "user_id", "timestamp")
+chat_session = _table("chat_session", "user_id", "date", "updated_at")
+chat_message = _table("chat_message", "session_id", "created_at")
+community_post = _table("community_post", "category", "likes_count", "comments_count", "created_at")
+post_comment = _table("post_comment", "post_id", "created_at")
+coaching_session = _table("coaching_session", "coach_id", "client_id", "created_at")
+coaching_message = _table("coaching_message", "session_id", "created_at")
+
+INDEXES = [
+    Index("ix_mood_entry_user_timestamp", mood_entry.c.user_id, mood_entry.c.timestamp),
+    Index("ix_chat_session_user_date", chat_session.c.user_id, chat_session.c.date),
+    Index("ix_chat_session_user_updated", chat_session.c.user_id, chat_session.c.updated_at),
+    Index("ix_chat_message_session_created", chat_message.c.session_id, chat_message.c.created_at),
+    Index("ix_community_post_created", community_post.c.created_at),
+    Index("ix_community_post_likes", community_post.c.likes_count, community_post.c.created_at),
+    Index("ix_community_post_comments", community_post.c.comments_count, community_post.c.created_at),
+    Index("ix_community_post_category_created", community_post.c.category, community_post.c.created_at),
+    Index("ix_community_post_category_likes",
+          community_post.c.category, community_post.c.likes_count, community_post.c.created_at),
+    Index("ix_community_post_category_comments",
+          community_post.c.category, community_post.c.comments_count, community_post.c.created_at),
+    Index("ix_post_comment_post_created", post_comment.c.post_id, post_comment.c.created_at),
+    Index("ix_coaching_session_coach_created", coaching_session.c.coach_id, coaching_session.c.created_at),
+    Index("ix_coaching_session_client_created", coaching_session.c.client_id, coaching_session.c.created_at),
+    Index("ix_coaching_message_session_created", coaching_message.c.session_id, coaching_message.c.created_at),
+]
+
+
+def upgrade(connection):
+    for index in INDEXES:
+        create_index(connection, index)
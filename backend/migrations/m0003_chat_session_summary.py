@@ -0,0 +1,78 @@
+"""Message count and last message summary on chat sessions"""
+
+from sqlalchemy import Column, DateTime, Integer, String, bindparam, func, select
+from sqlalchemy.sql import column, table
+from backend.migrations.ops import add_column
+
+COLUMNS = [
+    Column("message_count", Integer, nullable=False, server_default="0"),
+    Column("last_message_at", DateTime),
+    Column("last_message_preview", String(103)),
+]
+PREVIEW_LENGTH = 100
+BATCH_SIZE = 500
+
+# No onupdate here, so the backfill leaves updated_at alone
+sessions = table(
+    "chat_session",
+    column("id"), column("message_count"),
+    column("last_message_at", DateTime), column("last_message_preview"),
+)
+messages = table(
+    "chat_message", column("id"), column("session_id"), column("content"), column("created_at", DateTime)
+)
+
+
+def preview(content):
+    if not content:
+        return ''
+    return content[:PREVIEW_LENGTH] + '...' if len(content) > PREVIEW_LENGTH else content
+
+
+def backfill(connection):
+    totals = {
+        row.session_id: row
+        for row in connection.execute(
+            select(
+                messages.c.session_id,
+                func.count(messages.c.id).label("message_count"),
+                func.max(messages.c.id).label("last_id"),
+            ).group_by(messages.c.session_id)
+        )
+    }
+    session_ids = [row[0] for row in connection.execute(select(sessions.c.id))]
+    update = (
+        sessions.update()
+        .where(sessions.c.id == bindparam("session_id"))
+        .values(
+            message_count=bindparam("count"),
+            last_message_at=bindparam("last_at"),
+            last_message_preview=bindparam("preview"),
+        )
+    )
+    for start in range(0, len(session_ids), BATCH_SIZE):
+        batch = session_ids[start:start + BATCH_SIZE]
+        last_ids = [totals[sid].last_id for sid in batch if sid in totals]
+        last_messages = {
+            row.session_id: row
+            for row in connection.execute(
+                select(messages.c.session_id, messages.c.content, messages.c.created_at)
+                .where(messages.c.id.in_(last_ids))
+            )
+        } if last_ids else {}
+        params = []
+        for sid in batch:
+            last = last_messages.get(sid)
+            params.append({
+                "session_id": sid,
+                "count": totals[sid].message_count if sid in totals else 0,
+                "last_at": last.created_at if last else None,
+                "preview": preview(last.content) if last else None,
+            })
+        connection.execute(update, params)
+
+
+def upgrade(connection):
+    added = [add_column(connection, "chat_session", definition) for definition in COLUMNS]
+    if any(added):
+        backfill(connection)
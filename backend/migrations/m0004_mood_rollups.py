@@ -0,0 +1,63 @@
+"""Daily and weekly mood rollup tables, filled from existing moods"""
+
+from sqlalchemy import Column, Date, ForeignKey, Integer, MetaData, Table, UniqueConstraint, case, func, select
+from sqlalchemy.sql import column, table
+from backend.migrations.ops import create_table
+
+LEVEL_SCORES = {'excellent': 5, 'good': 4, 'okay': 3, 'poor': 2, 'terrible': 1}
+DEFAULT_SCORE = 3
+
+metadata = MetaData()
+Table("user", metadata, Column("id", Integer, primary_key=True))
+
+
+def _rollup_table(name, key_name, constraint):
+    return Table(
+        name, metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+        Column(key_name, Date, nullable=False),
+        Column("count", Integer, nullable=False),
+        Column("score_sum", Integer, nullable=False),
+        *(Column(f"{level}_count", Integer, nullable=False) for level in LEVEL_SCORES),
+        UniqueConstraint("user_id", key_name, name=constraint),
+    )
+
+
+# (table, key column name, period)
+ROLLUPS = (
+    (_rollup_table("mood_daily_rollup", "day", "unique_mood_daily_rollup"), "day", "day"),
+    (_rollup_table("mood_weekly_rollup", "week_start", "unique_mood_weekly_rollup"), "week_start", "week"),
+)
+
+moods = table("mood_entry", column("user_id"), column("level"), column("timestamp"))
+
+
+def bucket_start(period, dialect):
+    """First day of the day/week (Monday) containing a mood"""
+    ts = moods.c.timestamp
+    if dialect == 'sqlite':
+        return {'day': func.date(ts), 'week': func.date(ts, 'weekday 0', '-6 days')}[period]
+    if dialect == 'mysql':
+        return {'day': func.date(ts), 'week': func.subdate(func.date(ts), func.weekday(ts))}[period]
+    return func.date_trunc(period, ts).cast(Date)
+
+
+def rebuild(connection):
+    score = case(LEVEL_SCORES, value=moods.c.level, else_=DEFAULT_SCORE)
+    for rollup, key_name, period in ROLLUPS:
+        connection.execute(rollup.delete())
+        bucket = bucket_start(period, connection.dialect.name)
+        source = select(
+            moods.c.user_id, bucket, func.count(), func.sum(score),
+            *(func.sum(case((moods.c.level == level, 1), else_=0)) for level in LEVEL_SCORES)
+        ).group_by(moods.c.user_id, bucket)
+        target = ['user_id', key_name, 'count', 'score_sum'] + [f"{level}_count" for level in LEVEL_SCORES]
+        connection.execute(rollup.insert().from_select(target, source))
+
+
+def upgrade(connection):
+    for rollup, _, _ in ROLLUPS:
+        create_table(connection, rollup)
+    # Rebuilt even if the tables already existed: rollups are derived entirely from mood_entry
+    rebuild(connection)
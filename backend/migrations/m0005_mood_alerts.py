@@ -0,0 +1,39 @@
+"""Mood anomaly detector state and alerts; a user's state is seeded from their moods on first use"""
+
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table
+from backend.migrations.ops import create_table
+
+metadata = MetaData()
+Table("user", metadata, Column("id", Integer, primary_key=True))
+
+TABLES = [
+    Table(
+        "mood_signal_state", metadata,
+        Column("user_id", Integer, ForeignKey("user.id"), primary_key=True),
+        Column("count", Integer, nullable=False),
+        Column("mean", Float, nullable=False),
+        Column("baseline", Float, nullable=False),
+        Column("variance", Float, nullable=False),
+        Column("low_run", Integer, nullable=False),
+        Column("shift_active", Boolean, nullable=False),
+        Column("last_score", Integer),
+        Column("updated_at", DateTime),
+    ),
+    Table(
+        "mood_alert", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, ForeignKey("user.id"), nullable=False),
+        Column("mood_id", Integer),
+        Column("kind", String(20), nullable=False),
+        Column("score", Integer, nullable=False),
+        Column("baseline", Float),
+        Column("message", String(200), nullable=False),
+        Column("created_at", DateTime),
+        Index("ix_mood_alert_user_created", "user_id", "created_at"),
+    ),
+]
+
+
+def upgrade(connection):
+    for definition in TABLES:
+        create_table(connection, definition)
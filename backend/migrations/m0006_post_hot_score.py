@@ -0,0 +1,57 @@
+"""Hot score column and indexes for the "hot" community feed, scored for existing posts"""
+
+import math
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Float, Index, MetaData, Table, bindparam, select
+from sqlalchemy.sql import column, table
+from backend.migrations.ops import add_column, create_index
+
+# The score as of this migration (services/hot_ranking.py may change later):
+# log10(max(likes + COMMENT_WEIGHT * comments, 1)) + (created_at - EPOCH) / DECAY_SECONDS
+COMMENT_WEIGHT = 2
+DECAY_SECONDS = 45000
+EPOCH = datetime(2024, 1, 1)
+BATCH_SIZE = 500
+
+HOT_SCORE = Column("hot_score", Float, nullable=False, server_default="0")
+
+metadata = MetaData()
+indexed = Table("community_post", metadata, Column("category"), Column("hot_score"), Column("created_at"))
+INDEXES = [
+    Index("ix_community_post_hot", indexed.c.hot_score, indexed.c.created_at),
+    Index("ix_community_post_category_hot", indexed.c.category, indexed.c.hot_score, indexed.c.created_at),
+]
+
+posts = table(
+    "community_post",
+    column("id"), column("likes_count"), column("comments_count"),
+    column("created_at", DateTime), column("hot_score"),
+)
+
+
+def hot_score(likes, comments, created_at):
+    engagement = (likes or 0) + COMMENT_WEIGHT * (comments or 0)
+    return math.log10(max(engagement, 1)) + (created_at - EPOCH).total_seconds() / DECAY_SECONDS
+
+
+def upgrade(connection):
+    add_column(connection, "community_post", HOT_SCORE)
+    for index in INDEXES:
+        create_index(connection, index)
+
+    update = posts.update().where(posts.c.id == bindparam("post_id")).values(hot_score=bindparam("score"))
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            select(posts.c.id, posts.c.likes_count, posts.c.comments_count, posts.c.created_at)
+            .where(posts.c.id > last_id, posts.c.created_at.is_not(None))
+            .order_by(posts.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        connection.execute(update, [
+            {"post_id": row.id, "score": hot_score(row.likes_count, row.comments_count, row.created_at)}
+            for row in rows
+        ])
+        last_id = rows[-1].id
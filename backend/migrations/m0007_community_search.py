@@ -0,0 +1,54 @@
+"""Full-text indexes over community posts and comments (FTS5 on SQLite, FULLTEXT on MySQL)"""
+
+from sqlalchemy import inspect
+
+# External-content FTS5 tables, plus triggers that keep them in step with their tables.
+# Updates that don't touch the indexed columns (counters, scores) leave the index alone.
+FTS5_STATEMENTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS community_post_fts USING fts5(title, content, "
+    "content='community_post', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS community_post_fts_ai AFTER INSERT ON community_post BEGIN "
+    "INSERT INTO community_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS community_post_fts_ad AFTER DELETE ON community_post BEGIN "
+    "INSERT INTO community_post_fts(community_post_fts, rowid, title, content) "
+    "VALUES ('delete', old.id, old.title, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS community_post_fts_au AFTER UPDATE OF title, content ON community_post BEGIN "
+    "INSERT INTO community_post_fts(community_post_fts, rowid, title, content) "
+    "VALUES ('delete', old.id, old.title, old.content); "
+    "INSERT INTO community_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+
+    "CREATE VIRTUAL TABLE IF NOT EXISTS post_comment_fts USING fts5(content, "
+    "content='post_comment', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS post_comment_fts_ai AFTER INSERT ON post_comment BEGIN "
+    "INSERT INTO post_comment_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS post_comment_fts_ad AFTER DELETE ON post_comment BEGIN "
+    "INSERT INTO post_comment_fts(post_comment_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS post_comment_fts_au AFTER UPDATE OF content ON post_comment BEGIN "
+    "INSERT INTO post_comment_fts(post_comment_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO post_comment_fts(rowid, content) VALUES (new.id, new.content); END",
+
+    # Index the rows already in the tables
+    "INSERT INTO community_post_fts(community_post_fts) VALUES ('rebuild')",
+    "INSERT INTO post_comment_fts(post_comment_fts) VALUES ('rebuild')",
+]
+
+FULLTEXT_INDEXES = [
+    ("community_post", "ft_community_post", "title, content"),
+    ("post_comment", "ft_post_comment", "content"),
+]
+
+
+def fts5_available(connection):
+    return connection.dialect.name == "sqlite" and bool(connection.exec_driver_sql(
+        "SELECT 1 FROM pragma_compile_options WHERE compile_options = 'ENABLE_FTS5'"
+    ).first())
+
+
+def upgrade(connection):
+    if fts5_available(connection):
+        for statement in FTS5_STATEMENTS:
+            connection.exec_driver_sql(statement)
+    elif connection.dialect.name == "mysql":
+        for table, name, columns in FULLTEXT_INDEXES:
+            if name not in {ix["name"] for ix in inspect(connection).get_indexes(table)}:
+                connection.exec_driver_sql(f"ALTER TABLE {table} ADD FULLTEXT INDEX {name} ({columns})")
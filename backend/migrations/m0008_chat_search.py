@@ -0,0 +1,44 @@
+"""Full-text index over chat messages, searchable per user (FTS5 on SQLite, FULLTEXT on MySQL)"""
+
+from sqlalchemy import inspect
+
+# The index holds each message's content plus an owner token ('u' || user id), so one
+# user's messages are found through the index rather than a join. The view is its
+# content source (rebuilds and snippets) and returns the same columns.
+OWNER_TOKEN = "'u' || (SELECT user_id FROM chat_session WHERE id = {row}.session_id)"
+
+FTS5_STATEMENTS = [
+    "CREATE VIEW IF NOT EXISTS chat_message_search AS "
+    "SELECT m.id AS id, m.content AS content, 'u' || s.user_id AS owner "
+    "FROM chat_message m JOIN chat_session s ON s.id = m.session_id",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS chat_message_fts USING fts5(content, owner, "
+    "content='chat_message_search', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS chat_message_fts_ai AFTER INSERT ON chat_message BEGIN "
+    "INSERT INTO chat_message_fts(rowid, content, owner) "
+    f"VALUES (new.id, new.content, {OWNER_TOKEN.format(row='new')}); END",
+    "CREATE TRIGGER IF NOT EXISTS chat_message_fts_ad AFTER DELETE ON chat_message BEGIN "
+    "INSERT INTO chat_message_fts(chat_message_fts, rowid, content, owner) "
+    f"VALUES ('delete', old.id, old.content, {OWNER_TOKEN.format(row='old')}); END",
+    "CREATE TRIGGER IF NOT EXISTS chat_message_fts_au AFTER UPDATE OF content ON chat_message BEGIN "
+    "INSERT INTO chat_message_fts(chat_message_fts, rowid, content, owner) "
+    f"VALUES ('delete', old.id, old.content, {OWNER_TOKEN.format(row='old')}); "
+    "INSERT INTO chat_message_fts(rowid, content, owner) "
+    f"VALUES (new.id, new.content, {OWNER_TOKEN.format(row='new')}); END",
+    # Index the messages already stored
+    "INSERT INTO chat_message_fts(chat_message_fts) VALUES ('rebuild')",
+]
+
+
+def fts5_available(connection):
+    return connection.dialect.name == "sqlite" and bool(connection.exec_driver_sql(
+        "SELECT 1 FROM pragma_compile_options WHERE compile_options = 'ENABLE_FTS5'"
+    ).first())
+
+
+def upgrade(connection):
+    if fts5_available(connection):
+        for statement in FTS5_STATEMENTS:
+            connection.exec_driver_sql(statement)
+    elif connection.dialect.name == "mysql":
+        if "ft_chat_message" not in {ix["name"] for ix in inspect(connection).get_indexes("chat_message")}:
+            connection.exec_driver_sql("ALTER TABLE chat_message ADD FULLTEXT INDEX ft_chat_message (content)")
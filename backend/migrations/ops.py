@@ -0,0 +1,38 @@
+"""Idempotent schema operations for migrations.
+
+Migrations pass their own frozen Table, Column and Index definitions rather
+than the models', so a migration does the same thing however the models change.
+"""
+
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+
+
+def has_column(connection, table_name, column_name):
+    return any(c["name"] == column_name for c in inspect(connection).get_columns(table_name))
+
+
+def add_column(connection, table_name, column):
+    """Add an unattached Column to a table, unless the table already has it"""
+    if has_column(connection, table_name, column.name):
+        return False
+    ddl = CreateColumn(column).compile(dialect=connection.dialect)
+    connection.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {ddl}")
+    return True
+
+
+def create_index(connection, index):
+    """Create an Index declared on a migration's Table, unless it exists"""
+    existing = {ix["name"] for ix in inspect(connection).get_indexes(index.table.name)}
+    if index.name in existing:
+        return False
+    index.create(bind=connection)
+    return True
+
+
+def create_table(connection, table):
+    """Create a migration's Table, unless it exists"""
+    if inspect(connection).has_table(table.name):
+        return False
+    table.create(bind=connection)
+    return True
@@ -1,11 +1,13 @@
 from .user import (
-    db, User, MoodEntry, log_chat, 
+    db, User, MoodEntry, MoodIndexJob, MoodDailyRollup, MoodWeeklyRollup,
+    MoodSignalState, MoodAlert, log_chat,
     CommunityPost, PostComment, PostLike, CommentLike,
     CoachingSession, CoachingMessage, ChatSession, ChatMessage
 )
 
 __all__ = [
-    'db', 'User', 'MoodEntry', 'log_chat',
+    'db', 'User', 'MoodEntry', 'MoodIndexJob', 'MoodDailyRollup', 'MoodWeeklyRollup',
+    'MoodSignalState', 'MoodAlert', 'log_chat',
     'CommunityPost', 'PostComment', 'PostLike', 'CommentLike',
     'CoachingSession', 'CoachingMessage', 'ChatSession', 'ChatMessage'
 ]
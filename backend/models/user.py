@@ -1,8 +1,6 @@
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
-
-db = SQLAlchemy()
+from backend.utils.db import db
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -33,6 +31,77 @@ class MoodEntry(db.Model):
     note = db.Column(db.Text)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (db.Index('ix_mood_entry_user_timestamp', 'user_id', 'timestamp'),)
+
+# Per-user mood rollups, maintained with every mood write (see services/mood_rollups.py)
+class MoodDailyRollup(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+    excellent_count = db.Column(db.Integer, nullable=False, default=0)
+    good_count = db.Column(db.Integer, nullable=False, default=0)
+    okay_count = db.Column(db.Integer, nullable=False, default=0)
+    poor_count = db.Column(db.Integer, nullable=False, default=0)
+    terrible_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'day', name='unique_mood_daily_rollup'),)
+
+class MoodWeeklyRollup(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    week_start = db.Column(db.Date, nullable=False)  # Monday
+    count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+    excellent_count = db.Column(db.Integer, nullable=False, default=0)
+    good_count = db.Column(db.Integer, nullable=False, default=0)
+    okay_count = db.Column(db.Integer, nullable=False, default=0)
+    poor_count = db.Column(db.Integer, nullable=False, default=0)
+    terrible_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'week_start', name='unique_mood_weekly_rollup'),)
+
+# Running statistics of a user's mood scores, updated per logged mood (see services/mood_anomaly.py)
+class MoodSignalState(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    mean = db.Column(db.Float, nullable=False, default=0.0)  # Fast EWMA: the recent level
+    baseline = db.Column(db.Float, nullable=False, default=0.0)  # Slow EWMA: the usual level
+    variance = db.Column(db.Float, nullable=False, default=0.0)  # EW variance around the baseline
+    low_run = db.Column(db.Integer, nullable=False, default=0)  # Consecutive poor-or-worse moods
+    shift_active = db.Column(db.Boolean, nullable=False, default=False)
+    last_score = db.Column(db.Integer)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class MoodAlert(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    mood_id = db.Column(db.Integer)  # No FK: the alert outlives a deleted mood
+    kind = db.Column(db.String(20), nullable=False)  # sudden_drop, downward_shift, low_streak
+    score = db.Column(db.Integer, nullable=False)
+    baseline = db.Column(db.Float)
+    message = db.Column(db.String(200), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_mood_alert_user_created', 'user_id', 'created_at'),)
+
+# Embedding/vector work queued by the mood routes, run by backend/index_worker.py
+class MoodIndexJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    mood_id = db.Column(db.Integer, nullable=False)  # No FK: delete jobs outlive the mood
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    action = db.Column(db.String(20), nullable=False, default='upsert')  # upsert, delete
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, failed (finished jobs are deleted)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_mood_index_job_status_run_after', 'status', 'run_after'),)
+
 class CommunityPost(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -42,6 +111,8 @@ class CommunityPost(db.Model):
     is_anonymous = db.Column(db.Boolean, default=False)
     likes_count = db.Column(db.Integer, default=0)
     comments_count = db.Column(db.Integer, default=0)
+    # Engagement plus recency for the "hot" feed (services/hot_ranking.py), refreshed on likes/comments
+    hot_score = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -50,6 +121,18 @@ class CommunityPost(db.Model):
     comments = db.relationship('PostComment', backref='post', cascade='all, delete-orphan')
     likes = db.relationship('PostLike', backref='post', cascade='all, delete-orphan')
 
+    # Feed orderings, with and without a category filter
+    __table_args__ = (
+        db.Index('ix_community_post_created', 'created_at'),
+        db.Index('ix_community_post_likes', 'likes_count', 'created_at'),
+        db.Index('ix_community_post_comments', 'comments_count', 'created_at'),
+        db.Index('ix_community_post_hot', 'hot_score', 'created_at'),
+        db.Index('ix_community_post_category_created', 'category', 'created_at'),
+        db.Index('ix_community_post_category_likes', 'category', 'likes_count', 'created_at'),
+        db.Index('ix_community_post_category_comments', 'category', 'comments_count', 'created_at'),
+        db.Index('ix_community_post_category_hot', 'category', 'hot_score', 'created_at'),
+    )
+
 class PostComment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     post_id = db.Column(db.Integer, db.ForeignKey('community_post.id'), nullable=False)
@@ -64,6 +147,8 @@ class PostComment(db.Model):
     parent = db.relationship('PostComment', remote_side=[id], backref='replies')
     likes = db.relationship('CommentLike', backref='comment', cascade='all, delete-orphan')
 
+    __table_args__ = (db.Index('ix_post_comment_post_created', 'post_id', 'created_at'),)
+
 class PostLike(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     post_id = db.Column(db.Integer, db.ForeignKey('community_post.id'), nullable=False)
@@ -99,6 +184,11 @@ class CoachingSession(db.Model):
     client = db.relationship('User', foreign_keys=[client_id], backref='coaching_sessions_as_client')
     coach = db.relationship('User', foreign_keys=[coach_id], backref='coaching_sessions_as_coach')
 
+    __table_args__ = (
+        db.Index('ix_coaching_session_coach_created', 'coach_id', 'created_at'),
+        db.Index('ix_coaching_session_client_created', 'client_id', 'created_at'),
+    )
+
 class CoachingMessage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.Integer, db.ForeignKey('coaching_session.id'), nullable=False)
@@ -111,6 +201,8 @@ class CoachingMessage(db.Model):
     session = db.relationship('CoachingSession', backref='messages')
     sender = db.relationship('User', backref='coaching_messages')
 
+    __table_args__ = (db.Index('ix_coaching_message_session_created', 'session_id', 'created_at'),)
+
 class ChatSession(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -118,11 +210,29 @@ class ChatSession(db.Model):
     date = db.Column(db.Date, nullable=False)  # For daily archiving
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Summary of the messages, kept up to date by record_messages() so listings need no per-session queries
+    message_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_message_at = db.Column(db.DateTime)
+    last_message_preview = db.Column(db.String(103))
     
     # Relationships
     user = db.relationship('User', backref='chat_sessions')
     messages = db.relationship('ChatMessage', cascade='all, delete-orphan')
 
+    def record_messages(self, *messages):
+        """Fold flushed messages (oldest first) into the summary; caller commits"""
+        last = messages[-1]
+        # Incremented in SQL so concurrent writers don't lose counts
+        self.message_count = ChatSession.message_count + len(messages)
+        self.last_message_at = last.created_at
+        self.last_message_preview = message_preview(last.content)
+        self.updated_at = datetime.utcnow()
+
+    __table_args__ = (
+        db.Index('ix_chat_session_user_date', 'user_id', 'date'),
+        db.Index('ix_chat_session_user_updated', 'user_id', 'updated_at'),
+    )
+
 class ChatMessage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.Integer, db.ForeignKey('chat_session.id'), nullable=False)
@@ -133,5 +243,13 @@ class ChatMessage(db.Model):
     # Relationships
     chat_session = db.relationship('ChatSession')
 
+    __table_args__ = (db.Index('ix_chat_message_session_created', 'session_id', 'created_at'),)
+
+def message_preview(content, length=100):
+    """First `length` characters of a message, with '...' when truncated"""
+    if not content:
+        return ''
+    return content[:length] + '...' if len(content) > length else content
+
 def log_chat(user_id, user_msg, bot_reply):
     print(f"[LOG] User {user_id} → {user_msg}\nBot → {bot_reply}")
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Rebuild the daily and weekly mood rollups from the mood entries.
+
+The mood endpoints keep the rollups current; use this after importing moods
+directly into the database or if the rollups are ever suspected to drift.
+
+    python backend/rebuild_mood_rollups.py [--user-id 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PARENT_DIR = os.path.dirname(CURRENT_DIR)
+if PARENT_DIR not in sys.path:
+    sys.path.append(PARENT_DIR)
+
+from backend.models.user import db
+from backend.services.mood_rollups import rebuild_rollups
+from backend.app import create_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild mood rollup tables")
+    parser.add_argument("--user-id", type=int, help="Only rebuild this user's rollups")
+    args = parser.parse_args()
+
+    app, _ = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        with db.engine.begin() as connection:
+            written = rebuild_rollups(connection, user_id=args.user_id)
+        print(f"Wrote {written} rollup rows in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
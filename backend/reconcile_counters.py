@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Recompute the community like and comment counters from the rows they count.
+
+Counters are kept with atomic increments, so drift only comes from manual
+edits, crashes between commit and a buffered flush, or older releases. Run
+this periodically (e.g. from cron) or after bulk data changes.
+
+    python backend/reconcile_counters.py [--batch-size 500]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PARENT_DIR = os.path.dirname(CURRENT_DIR)
+if PARENT_DIR not in sys.path:
+    sys.path.append(PARENT_DIR)
+
+from backend.models.user import db
+from backend.services.community_counters import reconcile_counters
+from backend.app import create_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fix drifted like/comment counters")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per transaction")
+    args = parser.parse_args()
+
+    app, _ = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        fixed = reconcile_counters(db.engine, batch_size=args.batch_size)
+        for name, count in fixed.items():
+            print(f"{name}: {count} rows fixed")
+        print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Re-embed and reindex mood entries into the vector store.
+
+Streams MoodEntry rows in id order, embeds many notes per request and
+upserts them in batches per user namespace. Progress is checkpointed after
+every chunk so an interrupted run resumes where it stopped.
+
+    python backend/reindex_moods.py [--user-id 3] [--restart]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add parent directory to path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PARENT_DIR = os.path.dirname(CURRENT_DIR)
+if PARENT_DIR not in sys.path:
+    sys.path.append(PARENT_DIR)
+
+from backend.models.user import db, MoodEntry
+from backend.services.mood_indexer import index_moods
+from backend.app import create_app
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return {"last_id": 0, "indexed": 0}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, state):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def reindex(args):
+    checkpoint = {"last_id": 0, "indexed": 0} if args.restart else load_checkpoint(args.checkpoint)
+    if checkpoint["last_id"]:
+        print(f"Resuming after mood {checkpoint['last_id']} ({checkpoint['indexed']} already indexed)")
+
+    started = time.perf_counter()
+    scanned = 0
+    indexed = 0
+
+    while True:
+        query = MoodEntry.query.filter(
+            MoodEntry.id > checkpoint["last_id"],
+            MoodEntry.note.isnot(None),
+            MoodEntry.note != ''
+        )
+        if args.user_id:
+            query = query.filter(MoodEntry.user_id == args.user_id)
+        chunk = query.order_by(MoodEntry.id.asc()).limit(args.chunk_size).all()
+        if not chunk:
+            break
+
+        written = index_moods(
+            chunk,
+            embed_batch_size=args.embed_batch,
+            upsert_batch_size=args.upsert_batch,
+            workers=args.workers
+        )
+        scanned += len(chunk)
+        indexed += written
+
+        checkpoint["last_id"] = chunk[-1].id
+        checkpoint["indexed"] += written
+        checkpoint["updated_at"] = time.time()
+        save_checkpoint(args.checkpoint, checkpoint)
+
+        # Release the ORM objects of this chunk before loading the next one
+        db.session.expunge_all()
+
+        elapsed = time.perf_counter() - started
+        print(f"Indexed {indexed} moods up to id {checkpoint['last_id']} "
+              f"({scanned / elapsed:.1f} rows/s)")
+
+    elapsed = time.perf_counter() - started
+    rate = scanned / elapsed if elapsed else 0.0
+    print(f"Done: {indexed} vectors from {scanned} rows in {elapsed:.1f}s ({rate:.1f} rows/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed and reindex mood entries")
+    parser.add_argument("--user-id", type=int, help="Only reindex this user's moods")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Rows loaded per database query")
+    parser.add_argument("--embed-batch", type=int, default=100, help="Notes per embeddings request")
+    parser.add_argument("--upsert-batch", type=int, default=100, help="Vectors per upsert request")
+    parser.add_argument("--workers", type=int, default=4, help="Namespaces upserted concurrently")
+    parser.add_argument("--checkpoint", help="Checkpoint file path (defaults to instance/reindex_checkpoint*.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+    args = parser.parse_args()
+    if not args.checkpoint:
+        suffix = f"_user{args.user_id}" if args.user_id else ""
+        args.checkpoint = os.path.join(PARENT_DIR, "instance", f"reindex_checkpoint{suffix}.json")
+
+    app, _ = create_app()
+    with app.app_context():
+        reindex(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,8 @@
-from flask import Blueprint, request, jsonify
+import json
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import date, datetime
-from backend.services.chat_service import generate_response
-from backend.models.user import log_chat, db, ChatSession, ChatMessage
+from backend.services.chat_service import generate_response, stream_response, persist_chat_exchange
+from backend.models.user import log_chat
 
 chat_bp = Blueprint('chat', __name__)
 
@@ -17,40 +17,41 @@ def chat():
     # Generate AI response
     reply = generate_response(user_id, message)
     
-    # Get or create today's chat session
-    today = date.today()
-    session = ChatSession.query.filter_by(user_id=user_id, date=today).first()
-    
-    if not session:
-        # Create new session for today
-        session = ChatSession(
-            user_id=user_id,
-            title=f'Conversation - {today.strftime("%B %d, %Y")}',
-            date=today
-        )
-        db.session.add(session)
-        db.session.flush()  # Get the session ID
-    
-    # Save user message
-    user_msg = ChatMessage(
-        session_id=session.id,
-        content=message,
-        message_type='user'
-    )
-    db.session.add(user_msg)
-    
-    # Save bot response
-    bot_msg = ChatMessage(
-        session_id=session.id,
-        content=reply,
-        message_type='bot'
-    )
-    db.session.add(bot_msg)
-    
-    # Update session timestamp
-    session.updated_at = datetime.utcnow()
-    
-    db.session.commit()
+    persist_chat_exchange(user_id, message, reply)
     
     log_chat(user_id, message, reply)
     return jsonify({"response": reply})
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@chat_bp.route('/chat/stream', methods=['POST'])
+@jwt_required()
+def chat_stream():
+    """Stream the AI reply as Server-Sent Events: token events, then one done event"""
+    user_id = int(get_jwt_identity())
+    payload = request.get_json() or {}
+    message = payload.get('message', '')
+    
+    if not message.strip():
+        return jsonify({"error": "Message is required"}), 400
+    
+    def events():
+        parts = []
+        for token in stream_response(user_id, message):
+            parts.append(token)
+            yield _sse('token', {"token": token})
+        
+        # Persist only once the whole reply has been produced
+        reply = "".join(parts).strip()
+        persist_chat_exchange(user_id, message, reply)
+        log_chat(user_id, message, reply)
+        yield _sse('done', {"response": reply})
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -2,10 +2,15 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, date
 from backend.models.user import db, ChatSession, ChatMessage
+from backend.services.chat_search import search_chat_history
+from backend.utils.cursor import encode_cursor, decode_cursor
+from backend.utils.fts import query_terms
 
 
 chat_history_bp = Blueprint('chat_history', __name__)
 
+MAX_SEARCH_RESULTS = 50
+
 
 @chat_history_bp.route('/chat/sessions', methods=['GET'])
 @jwt_required()
@@ -28,15 +33,10 @@ def get_chat_sessions():
                 'sessions': []
             }
 
-        # Get message count for this session
-        message_count = ChatMessage.query.filter_by(
-            session_id=session.id
-        ).count()
-
         sessions_by_date[date_str]['sessions'].append({
             'id': session.id,
             'title': session.title,
-            'message_count': message_count,
+            'message_count': session.message_count,
             'created_at': session.created_at.isoformat(),
             'updated_at': session.updated_at.isoformat()
         })
@@ -48,6 +48,33 @@ def get_chat_sessions():
     return jsonify(result)
 
 
+@chat_history_bp.route('/chat/search', methods=['GET'])
+@jwt_required()
+def search_chat_messages():
+    """Search the current user's messages; each hit links to its session"""
+    user_id = int(get_jwt_identity())
+    text = request.args.get('q', '')
+    if not query_terms(text):
+        return jsonify({'error': 'q is required'}), 400
+    limit = min(max(request.args.get('limit', 20, type=int), 1), MAX_SEARCH_RESULTS)
+
+    after = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            score, message_id = decode_cursor(cursor)
+            after = (float(score), int(message_id))
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+    hits, next_key = search_chat_history(user_id, text, limit=limit, after=after)
+    return jsonify({
+        'results': hits,
+        'next_cursor': encode_cursor(*next_key) if next_key else None,
+        'has_more': next_key is not None
+    })
+
+
 @chat_history_bp.route('/chat/sessions/<int:session_id>', methods=['GET'])
 @jwt_required()
 def get_chat_session(session_id):
@@ -152,9 +179,10 @@ def add_chat_message(session_id):
     )
 
     db.session.add(message)
+    db.session.flush()
 
-    # Update session timestamp
-    session.updated_at = datetime.utcnow()
+    # Update session summary and timestamp
+    session.record_messages(message)
 
     db.session.commit()
 
@@ -224,27 +252,12 @@ def get_recent_sessions():
 
     result = []
     for session in sessions:
-        # Get message count
-        message_count = ChatMessage.query.filter_by(
-            session_id=session.id
-        ).count()
-
-        # Get last message preview
-        last_message = ChatMessage.query.filter_by(
-            session_id=session.id
-        ).order_by(ChatMessage.created_at.desc()).first()
-        last_message_preview = (
-            last_message.content[:100] + '...'
-            if last_message and len(last_message.content) > 100
-            else (last_message.content if last_message else '')
-        )
-
         result.append({
             'id': session.id,
             'title': session.title,
             'date': session.date.isoformat(),
-            'message_count': message_count,
-            'last_message_preview': last_message_preview,
+            'message_count': session.message_count,
+            'last_message_preview': session.last_message_preview or '',
             'updated_at': session.updated_at.isoformat()
         })
 
@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from backend.models.user import db, User, CoachingSession, CoachingMessage
-from datetime import datetime
+from backend.services.mood_trends import mood_buckets, mood_streaks
+from backend.services.mood_anomaly import recent_alerts, alert_json
+from datetime import datetime, timedelta
 
 coaching_bp = Blueprint('coaching', __name__)
 
@@ -84,6 +86,29 @@ def get_coaching_sessions():
         }
     } for session in sessions])
 
+# Mood overview of a client, for coaches who have a session with them
+@coaching_bp.route('/coaching/clients/<int:client_id>/moods', methods=['GET'])
+@jwt_required()
+def get_client_moods(client_id):
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if not user or not user.is_coach():
+        return jsonify({'error': 'Only coaches can view client moods'}), 403
+    
+    has_session = CoachingSession.query.filter_by(coach_id=user_id, client_id=client_id).first()
+    if not has_session:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    # Served from the rollup tables: at most 14 daily and 12 weekly rows, plus recent alerts
+    today = datetime.utcnow().date()
+    return jsonify({
+        'client_id': client_id,
+        'daily': mood_buckets(client_id, 'day', today - timedelta(days=13), today),
+        'weekly': mood_buckets(client_id, 'week', today - timedelta(weeks=11), today),
+        'streaks': mood_streaks(client_id),
+        'alerts': [alert_json(alert) for alert in recent_alerts(client_id, days=30, limit=10)]
+    })
+
 # Get specific coaching session
 @coaching_bp.route('/coaching/sessions/<int:session_id>', methods=['GET'])
 @jwt_required()
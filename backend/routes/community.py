@@ -1,37 +1,111 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+import os
+import time
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from backend.models.user import db, User, CommunityPost, PostComment, PostLike, CommentLike
+from backend.utils.cursor import encode_cursor, decode_cursor
+from backend.services.community_counters import adjust
+from backend.services.hot_ranking import hot_score
+from backend.services.community_search import search_community, SEARCH_TYPES
+from backend.utils.fts import query_terms
 from datetime import datetime
 
 community_bp = Blueprint('community', __name__)
 
+MAX_PER_PAGE = 100
+
+# Leading sort column of each feed order (created_at and id always follow)
+FEED_SORT_KEYS = {
+    'latest': None,
+    'most_liked': CommunityPost.likes_count,
+    'most_commented': CommunityPost.comments_count,
+    'hot': CommunityPost.hot_score,
+}
+
+# Feed sizes are cached for a while instead of running COUNT(*) on every page
+FEED_TOTAL_TTL = float(os.getenv("COMMUNITY_TOTAL_TTL_SECONDS", "60"))
+_feed_totals = {}
+
+def _feed_total(category):
+    cached = _feed_totals.get(category)
+    now = time.monotonic()
+    if cached and now - cached[1] < FEED_TOTAL_TTL:
+        return cached[0]
+    query = CommunityPost.query
+    if category != 'all':
+        query = query.filter_by(category=category)
+    total = query.count()
+    if len(_feed_totals) > 64:
+        _feed_totals.clear()
+    _feed_totals[category] = (total, now)
+    return total
+
+def _author(user):
+    return {
+        'id': user.id,
+        'display_name': user.display_name or 'Anonymous',
+        'is_coach': user.is_coach()
+    }
+
+def _comment_json(comment):
+    return {
+        'id': comment.id,
+        'content': comment.content,
+        'likes_count': comment.likes_count,
+        'created_at': comment.created_at.isoformat(),
+        'author': _author(comment.user)
+    }
+
 # Community Posts
 @community_bp.route('/community/posts', methods=['GET'])
 @jwt_required()
 def get_posts():
     page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), MAX_PER_PAGE)
     category = request.args.get('category', 'all')
-    sort_by = request.args.get('sort', 'latest')  # latest, most_liked, most_commented
+    sort_by = request.args.get('sort', 'latest')  # latest, most_liked, most_commented, hot
+    cursor = request.args.get('cursor')
+    if sort_by not in FEED_SORT_KEYS:
+        sort_by = 'latest'
+    sort_key = FEED_SORT_KEYS[sort_by]
     
-    query = CommunityPost.query
+    # Authors come in the same query as the page of posts
+    query = CommunityPost.query.options(joinedload(CommunityPost.user))
     
     if category != 'all':
         query = query.filter_by(category=category)
     
-    # Apply sorting
-    if sort_by == 'latest':
-        query = query.order_by(CommunityPost.created_at.desc())
-    elif sort_by == 'most_liked':
-        query = query.order_by(CommunityPost.likes_count.desc(), CommunityPost.created_at.desc())
-    elif sort_by == 'most_commented':
-        query = query.order_by(CommunityPost.comments_count.desc(), CommunityPost.created_at.desc())
-    else:
-        query = query.order_by(CommunityPost.created_at.desc())
-    
-    posts = query.paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    # Keyset order: (sort key, created_at, id), newest first on ties
+    order = ([sort_key] if sort_key is not None else []) + [CommunityPost.created_at, CommunityPost.id]
+    query = query.order_by(*[column.desc() for column in order])
+    
+    if cursor:
+        try:
+            cursor_sort, *values = decode_cursor(cursor)
+            if cursor_sort != sort_by or len(values) != len(order):
+                raise ValueError("Cursor does not match sort")
+            values[-2] = datetime.fromisoformat(values[-2])
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(tuple_(*order) < tuple(values))
+    elif page > 1:
+        # Numbered pages still work, but only cursors avoid the OFFSET scan
+        query = query.offset((page - 1) * per_page)
+    
+    posts = query.limit(per_page + 1).all()
+    has_more = len(posts) > per_page
+    posts = posts[:per_page]
+    
+    next_cursor = None
+    if has_more:
+        last = posts[-1]
+        key = [getattr(last, column.key) for column in order]
+        next_cursor = encode_cursor(sort_by, *key)
+    
+    total = _feed_total(category) if request.args.get('total', '1') != '0' else None
     
     return jsonify({
         'posts': [{
@@ -43,15 +117,42 @@ def get_posts():
             'likes_count': post.likes_count,
             'comments_count': post.comments_count,
             'created_at': post.created_at.isoformat(),
-            'author': {
-                'id': post.user.id,
-                'display_name': post.user.display_name or 'Anonymous',
-                'is_coach': post.user.is_coach()
-            } if not post.is_anonymous else None
-        } for post in posts.items],
-        'total': posts.total,
-        'pages': posts.pages,
-        'current_page': page
+            'author': _author(post.user) if not post.is_anonymous else None
+        } for post in posts],
+        'total': total,
+        'pages': -(-total // per_page) if total is not None else None,
+        'current_page': page if not cursor else None,
+        'next_cursor': next_cursor,
+        'has_more': has_more
+    })
+
+@community_bp.route('/community/search', methods=['GET'])
+@jwt_required()
+def search():
+    """Posts and comments matching ?q=, best match first, with highlighted snippets"""
+    text = request.args.get('q', '')
+    if not query_terms(text):
+        return jsonify({'error': 'q is required'}), 400
+    types = request.args.get('type', 'all')
+    if types not in SEARCH_TYPES:
+        return jsonify({'error': f"type must be one of {', '.join(SEARCH_TYPES)}"}), 400
+    category = request.args.get('category', 'all')
+    limit = min(max(request.args.get('limit', 20, type=int), 1), MAX_PER_PAGE)
+    
+    after = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            score, kind_order, hit_id = decode_cursor(cursor)
+            after = (float(score), int(kind_order), int(hit_id))
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+    
+    hits, next_key = search_community(text, category=category, types=types, limit=limit, after=after)
+    return jsonify({
+        'results': hits,
+        'next_cursor': encode_cursor(*next_key) if next_key else None,
+        'has_more': next_key is not None
     })
 
 @community_bp.route('/community/posts', methods=['POST'])
@@ -60,16 +161,20 @@ def create_post():
     user_id = int(get_jwt_identity())
     data = request.get_json()
     
+    now = datetime.utcnow()
     post = CommunityPost(
         user_id=user_id,
         title=data['title'],
         content=data['content'],
         category=data.get('category', 'general'),
-        is_anonymous=data.get('is_anonymous', False)
+        is_anonymous=data.get('is_anonymous', False),
+        created_at=now,
+        hot_score=hot_score(0, 0, now)
     )
     
     db.session.add(post)
     db.session.commit()
+    _feed_totals.clear()
     
     return jsonify({
         'id': post.id,
@@ -79,7 +184,19 @@ def create_post():
 @community_bp.route('/community/posts/<int:post_id>', methods=['GET'])
 @jwt_required()
 def get_post(post_id):
-    post = CommunityPost.query.get_or_404(post_id)
+    post = CommunityPost.query.options(joinedload(CommunityPost.user)).get_or_404(post_id)
+    
+    # The whole thread with its authors in one query; the tree is built in memory
+    comments = (
+        PostComment.query.options(joinedload(PostComment.user))
+        .filter_by(post_id=post_id)
+        .order_by(PostComment.created_at.asc(), PostComment.id.asc())
+        .all()
+    )
+    replies = {}
+    for comment in comments:
+        if comment.parent_id is not None:
+            replies.setdefault(comment.parent_id, []).append(comment)
     
     return jsonify({
         'id': post.id,
@@ -90,33 +207,14 @@ def get_post(post_id):
         'likes_count': post.likes_count,
         'comments_count': post.comments_count,
         'created_at': post.created_at.isoformat(),
-        'author': {
-            'id': post.user.id,
-            'display_name': post.user.display_name or 'Anonymous',
-            'is_coach': post.user.is_coach()
-        } if not post.is_anonymous else None,
-        'comments': [{
-            'id': comment.id,
-            'content': comment.content,
-            'likes_count': comment.likes_count,
-            'created_at': comment.created_at.isoformat(),
-            'author': {
-                'id': comment.user.id,
-                'display_name': comment.user.display_name or 'Anonymous',
-                'is_coach': comment.user.is_coach()
-            },
-            'replies': [{
-                'id': reply.id,
-                'content': reply.content,
-                'likes_count': reply.likes_count,
-                'created_at': reply.created_at.isoformat(),
-                'author': {
-                    'id': reply.user.id,
-                    'display_name': reply.user.display_name or 'Anonymous',
-                    'is_coach': reply.user.is_coach()
-                }
-            } for reply in comment.replies]
-        } for comment in sorted([c for c in post.comments if c.parent_id is None], key=lambda x: x.created_at)]
+        'author': _author(post.user) if not post.is_anonymous else None,
+        'comments': [
+            dict(
+                _comment_json(comment),
+                replies=[_comment_json(reply) for reply in replies.get(comment.id, [])]
+            )
+            for comment in comments if comment.parent_id is None
+        ]
     })
 
 @community_bp.route('/community/posts/<int:post_id>', methods=['PUT'])
@@ -148,6 +246,7 @@ def delete_post(post_id):
     
     db.session.delete(post)
     db.session.commit()
+    _feed_totals.clear()
     return jsonify({'message': 'Post deleted successfully'})
 
 # Post Likes
@@ -156,6 +255,9 @@ def delete_post(post_id):
 def like_post(post_id):
     user_id = int(get_jwt_identity())
     
+    if not db.session.query(CommunityPost.id).filter_by(id=post_id).first():
+        return jsonify({'error': 'Post not found'}), 404
+    
     # Check if already liked
     existing_like = PostLike.query.filter_by(post_id=post_id, user_id=user_id).first()
     if existing_like:
@@ -165,10 +267,14 @@ def like_post(post_id):
     db.session.add(like)
     
     # Update likes count
-    post = CommunityPost.query.get(post_id)
-    post.likes_count += 1
+    adjust(CommunityPost.likes_count, post_id, 1)
     
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request liked it first
+        db.session.rollback()
+        return jsonify({'message': 'Post already liked'}), 400
     return jsonify({'message': 'Post liked successfully'})
 
 @community_bp.route('/community/posts/<int:post_id>/like', methods=['DELETE'])
@@ -176,15 +282,13 @@ def like_post(post_id):
 def unlike_post(post_id):
     user_id = int(get_jwt_identity())
     
-    like = PostLike.query.filter_by(post_id=post_id, user_id=user_id).first()
-    if not like:
+    # Only the request that actually removes the like decrements the count
+    removed = PostLike.query.filter_by(post_id=post_id, user_id=user_id).delete(synchronize_session=False)
+    if not removed:
         return jsonify({'message': 'Post not liked'}), 400
     
-    db.session.delete(like)
-    
     # Update likes count
-    post = CommunityPost.query.get(post_id)
-    post.likes_count -= 1
+    adjust(CommunityPost.likes_count, post_id, -1)
     
     db.session.commit()
     return jsonify({'message': 'Post unliked successfully'})
@@ -196,6 +300,9 @@ def create_comment(post_id):
     user_id = int(get_jwt_identity())
     data = request.get_json()
     
+    if not db.session.query(CommunityPost.id).filter_by(id=post_id).first():
+        return jsonify({'error': 'Post not found'}), 404
+    
     comment = PostComment(
         post_id=post_id,
         user_id=user_id,
@@ -206,8 +313,7 @@ def create_comment(post_id):
     db.session.add(comment)
     
     # Update comments count
-    post = CommunityPost.query.get(post_id)
-    post.comments_count += 1
+    adjust(CommunityPost.comments_count, post_id, 1)
     
     db.session.commit()
     
@@ -241,8 +347,7 @@ def delete_comment(comment_id):
         return jsonify({'error': 'Unauthorized'}), 403
     
     # Update comments count
-    post = CommunityPost.query.get(comment.post_id)
-    post.comments_count -= 1
+    adjust(CommunityPost.comments_count, comment.post_id, -1)
     
     db.session.delete(comment)
     db.session.commit()
@@ -254,6 +359,9 @@ def delete_comment(comment_id):
 def like_comment(comment_id):
     user_id = int(get_jwt_identity())
     
+    if not db.session.query(PostComment.id).filter_by(id=comment_id).first():
+        return jsonify({'error': 'Comment not found'}), 404
+    
     # Check if already liked
     existing_like = CommentLike.query.filter_by(comment_id=comment_id, user_id=user_id).first()
     if existing_like:
@@ -263,10 +371,14 @@ def like_comment(comment_id):
     db.session.add(like)
     
     # Update likes count
-    comment = PostComment.query.get(comment_id)
-    comment.likes_count += 1
+    adjust(PostComment.likes_count, comment_id, 1)
     
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request liked it first
+        db.session.rollback()
+        return jsonify({'message': 'Comment already liked'}), 400
     return jsonify({'message': 'Comment liked successfully'})
 
 @community_bp.route('/community/comments/<int:comment_id>/like', methods=['DELETE'])
@@ -274,15 +386,13 @@ def like_comment(comment_id):
 def unlike_comment(comment_id):
     user_id = int(get_jwt_identity())
     
-    like = CommentLike.query.filter_by(comment_id=comment_id, user_id=user_id).first()
-    if not like:
+    # Only the request that actually removes the like decrements the count
+    removed = CommentLike.query.filter_by(comment_id=comment_id, user_id=user_id).delete(synchronize_session=False)
+    if not removed:
         return jsonify({'message': 'Comment not liked'}), 400
     
-    db.session.delete(like)
-    
     # Update likes count
-    comment = PostComment.query.get(comment_id)
-    comment.likes_count -= 1
+    adjust(PostComment.likes_count, comment_id, -1)
     
     db.session.commit()
     return jsonify({'message': 'Comment unliked successfully'})
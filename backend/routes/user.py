@@ -1,12 +1,19 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from backend.models.user import db, MoodEntry, User
-from backend.utils.pinecone import upsert_embedding
-from backend.utils.auth import get_embedding
+from backend.utils.bm25 import bm25_index
+from backend.services.index_queue import enqueue_mood_index
+from backend.services.mood_trends import mood_trends, PERIODS
+from backend.services import mood_rollups, mood_anomaly
+from backend.utils.cursor import encode_cursor, decode_cursor
+from datetime import datetime, timedelta
+from sqlalchemy import tuple_
 import os
 
 user_bp = Blueprint('user', __name__)
 
+MAX_MOOD_PAGE = 500
+
 @user_bp.route('/user/profile', methods=['GET'])
 @jwt_required()
 def get_user_profile():
@@ -27,16 +34,55 @@ def get_user_profile():
     })
 
 
+def _parse_date_arg(name, end_of_day=False):
+    """?start=/?end= as a datetime; a bare date for `end` includes that whole day"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
 @user_bp.route('/user/moods', methods=['GET'])
 @jwt_required()
 def get_moods():
+    """Newest first. With ?limit= the list is paged and X-Next-Cursor holds the next page's cursor"""
     user_id = int(get_jwt_identity())
-    moods = (
-        MoodEntry.query.filter_by(user_id=user_id)
-        .order_by(MoodEntry.timestamp.desc())
-        .all()
-    )
-    return jsonify([
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor')
+    try:
+        start = _parse_date_arg('start')
+        end = _parse_date_arg('end', end_of_day=True)
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO dates'}), 400
+
+    query = MoodEntry.query.filter_by(user_id=user_id)
+    if start:
+        query = query.filter(MoodEntry.timestamp >= start)
+    if end:
+        query = query.filter(MoodEntry.timestamp < end)
+    if cursor:
+        try:
+            timestamp, mood_id = decode_cursor(cursor)
+            after = (datetime.fromisoformat(timestamp), int(mood_id))
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(tuple_(MoodEntry.timestamp, MoodEntry.id) < after)
+    query = query.order_by(MoodEntry.timestamp.desc(), MoodEntry.id.desc())
+
+    next_cursor = None
+    if limit:
+        limit = min(max(limit, 1), MAX_MOOD_PAGE)
+        moods = query.limit(limit + 1).all()
+        if len(moods) > limit:
+            moods = moods[:limit]
+            next_cursor = encode_cursor(moods[-1].timestamp, moods[-1].id)
+    else:
+        moods = query.all()
+
+    response = jsonify([
         {
             "id": mood.id,
             "level": mood.level,
@@ -44,6 +90,27 @@ def get_moods():
             "timestamp": mood.timestamp.isoformat()
         } for mood in moods
     ])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+
+@user_bp.route('/user/moods/trends', methods=['GET'])
+@jwt_required()
+def get_mood_trends():
+    """Per day/week/month level counts and average score, streaks and a last-N summary"""
+    user_id = int(get_jwt_identity())
+    period = request.args.get('period', 'day')
+    if period not in PERIODS:
+        return jsonify({'error': f"period must be one of {', '.join(PERIODS)}"}), 400
+    try:
+        start = _parse_date_arg('start')
+        end = _parse_date_arg('end', end_of_day=True)
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO dates'}), 400
+    last_n = min(max(request.args.get('last', 7, type=int), 1), 365)
+
+    return jsonify(mood_trends(user_id, period=period, start=start, end=end, last_n=last_n))
 
 
 @user_bp.route('/user/moods', methods=['POST'])
@@ -57,32 +124,16 @@ def log_mood():
         note=data.get('note')
     )
     db.session.add(mood)
-    db.session.commit()
+    db.session.flush()  # Get the mood ID
+    mood_rollups.add_mood(mood)
+    alerts = mood_anomaly.observe_mood(mood)
     
-    # Store in Pinecone for personalized chat responses
-    try:
-        if mood.note:  # Only index if there's a note
-            # Create text content for embedding
-            mood_text = f"Mood: {mood.level}. Note: {mood.note}"
-            embedding = get_embedding(mood_text)
-            
-            metadata = {
-                "text": mood_text,
-                "level": mood.level,
-                "note": mood.note,
-                "timestamp": mood.timestamp.isoformat(),
-                "user_id": user_id,
-                "mood_id": mood.id
-            }
-            
-            # Store in Pinecone with mood ID as vector ID
-            upsert_embedding(user_id, embedding, metadata)
-            print(f"Stored mood entry {mood.id} in Pinecone for user {user_id}")
-        else:
-            print(f"Mood entry {mood.id} has no note, skipping Pinecone storage")
-    except Exception as e:
-        print(f"Error storing mood in Pinecone: {e}")
-        # Don't fail the request if Pinecone storage fails
+    # Embedding and vector storage happen in the index worker, not on this request
+    if mood.note:
+        enqueue_mood_index(mood, 'upsert')
+    db.session.commit()
+    bm25_index.add_mood(mood)
+    mood_anomaly.notify_coaches(alerts)
     
     return jsonify({"message": "Mood saved."})
 
@@ -97,29 +148,13 @@ def update_mood(mood_id):
     if not mood:
         return jsonify({"error": "Mood entry not found"}), 404
     
+    old_level = mood.level
     mood.level = data['level']
     mood.note = data.get('note')
+    mood_rollups.change_mood_level(mood, old_level)
+    enqueue_mood_index(mood, 'upsert')
     db.session.commit()
-    
-    # Update in Pinecone
-    try:
-        if mood.note:
-            mood_text = f"Mood: {mood.level}. Note: {mood.note}"
-            embedding = get_embedding(mood_text)
-            
-            metadata = {
-                "text": mood_text,
-                "level": mood.level,
-                "note": mood.note,
-                "timestamp": mood.timestamp.isoformat(),
-                "user_id": user_id,
-                "mood_id": mood.id
-            }
-            
-            upsert_embedding(user_id, embedding, metadata)
-            print(f"Updated mood entry {mood.id} in Pinecone for user {user_id}")
-    except Exception as e:
-        print(f"Error updating mood in Pinecone: {e}")
+    bm25_index.add_mood(mood)
     
     return jsonify({"message": "Mood updated."})
 
@@ -133,8 +168,11 @@ def delete_mood(mood_id):
     if not mood:
         return jsonify({"error": "Mood entry not found"}), 404
     
+    enqueue_mood_index(mood, 'delete')
+    mood_rollups.remove_mood(mood)
     db.session.delete(mood)
     db.session.commit()
+    bm25_index.remove_mood(user_id, mood_id)
     
     return jsonify({"message": "Mood deleted."})
 
@@ -146,18 +184,26 @@ def pinecone_status():
     user_id = int(get_jwt_identity())
     
     try:
-        from backend.utils.pinecone import pinecone_initialized, index, _namespace_for_user
-        from backend.utils.auth import get_embedding
+        from backend.utils.pinecone import (
+            get_index, _namespace_for_user, _use_pinecone, _use_local, get_local_store, VECTOR_BACKEND
+        )
+        from backend.utils.embeddings import embedding_cache
         
+        index = get_index() if _use_pinecone() else None
         status = {
-            "pinecone_initialized": pinecone_initialized,
+            "vector_backend": VECTOR_BACKEND,
+            "pinecone_initialized": index is not None,
             "has_index": index is not None,
             "user_namespace": f"user-{user_id}",
             "openai_available": bool(os.getenv("OPENAI_API_KEY")),
-            "pinecone_available": bool(os.getenv("PINECONE_API_KEY"))
+            "pinecone_available": bool(os.getenv("PINECONE_API_KEY")),
+            "embedding_cache": embedding_cache.stats()
         }
         
-        if pinecone_initialized and index:
+        if _use_local():
+            status["local_vectors"] = get_local_store().count(_namespace_for_user(user_id))
+        
+        if index:
             try:
                 ns = _namespace_for_user(user_id)
                 # Get stats for the user's namespace
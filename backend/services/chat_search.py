@@ -0,0 +1,113 @@
+from datetime import date, datetime
+from sqlalchemy import inspect
+from backend.models.user import db
+from backend.utils.fts import (
+    MARK_START, MARK_END, fts5_available, fts5_query, query_terms, highlight_excerpt, render_snippet
+)
+
+SNIPPET_TOKENS = 16
+# Indexed next to the content (see migration 0008) so a user's messages are found through
+# the index, not a join
+OWNER_COLUMN = "owner"
+
+# Search backend per database URL: fts5, fulltext or like
+_backends = {}
+
+
+def search_backend():
+    url = str(db.engine.url)
+    if url not in _backends:
+        with db.engine.connect() as connection:
+            if fts5_available(connection) and inspect(connection).has_table("chat_message_fts"):
+                _backends[url] = "fts5"
+            elif connection.dialect.name == "mysql":
+                _backends[url] = "fulltext"
+            else:
+                _backends[url] = "like"
+    return _backends[url]
+
+
+def owner_token(user_id):
+    return f"u{int(user_id)}"
+
+
+def search_chat_history(user_id, text, limit=20, after=None):
+    """The user's chat messages matching `text`, best first; returns (hits, key of the next page).
+
+    Page keys are (score, id) of a page's last hit; the next key is None on the last page.
+    """
+    terms = query_terms(text)
+    backend = search_backend()
+    params = {'user_id': user_id, 'limit': limit + 1}
+    select_list = (
+        "m.id AS id, m.session_id AS session_id, m.message_type AS message_type, m.created_at AS created_at, "
+        "s.title AS session_title, s.date AS session_date"
+    )
+
+    if backend == "fts5":
+        params.update(
+            match=f'{OWNER_COLUMN} : "{owner_token(user_id)}" AND content : ({fts5_query(text)})',
+            mark_start=MARK_START, mark_end=MARK_END
+        )
+        source = (
+            f"SELECT {select_list}, "
+            f"snippet(chat_message_fts, 0, :mark_start, :mark_end, '…', {SNIPPET_TOKENS}) AS snippet, "
+            "bm25(chat_message_fts, 1.0, 0.0) AS score "
+            "FROM chat_message_fts JOIN chat_message m ON m.id = chat_message_fts.rowid "
+            "JOIN chat_session s ON s.id = m.session_id "
+            "WHERE chat_message_fts MATCH :match AND s.user_id = :user_id"
+        )
+    elif backend == "fulltext":
+        # MySQL scores grow with relevance; negated so both backends sort ascending
+        match = "MATCH(m.content) AGAINST (:match IN BOOLEAN MODE)"
+        params['match'] = " ".join(f"+{term}" for term in terms[:-1]) + f" +{terms[-1]}*"
+        source = (
+            f"SELECT {select_list}, m.content AS body, -{match} AS score "
+            "FROM chat_message m JOIN chat_session s ON s.id = m.session_id "
+            f"WHERE s.user_id = :user_id AND {match}"
+        )
+    else:
+        # No index to rank with: newest first
+        conditions = []
+        for i, term in enumerate(terms):
+            params[f'term{i}'] = "%" + term.replace("\\", "\\\\").replace("_", "\\_") + "%"
+            conditions.append(f"lower(m.content) LIKE :term{i} ESCAPE '\\'")
+        source = (
+            f"SELECT {select_list}, m.content AS body, -m.id AS score "
+            "FROM chat_message m JOIN chat_session s ON s.id = m.session_id "
+            f"WHERE s.user_id = :user_id AND {' AND '.join(conditions)}"
+        )
+
+    seek = ""
+    if after:
+        seek = " WHERE (score, id) > (:after_score, :after_id)"
+        params.update(after_score=after[0], after_id=after[1])
+    sql = f"SELECT * FROM ({source}) hits{seek} ORDER BY score, id LIMIT :limit"
+    rows = db.session.execute(db.text(sql), params).mappings().all()
+
+    hits = []
+    for row in rows[:limit]:
+        raw = row['snippet'] if backend == "fts5" else highlight_excerpt(row['body'], terms)
+        created_at, session_date = row['created_at'], row['session_date']
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        if isinstance(session_date, str):
+            session_date = date.fromisoformat(session_date)
+        hits.append({
+            'id': row['id'],
+            'message_type': row['message_type'],
+            'snippet': render_snippet(raw),
+            'created_at': created_at.isoformat() if created_at else None,
+            'session': {
+                'id': row['session_id'],
+                'title': row['session_title'],
+                'date': session_date.isoformat() if session_date else None,
+                # Same path the history view loads the session from
+                'url': f"/chat/sessions/{row['session_id']}"
+            }
+        })
+    next_key = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_key = (last['score'], last['id'])
+    return hits, next_key
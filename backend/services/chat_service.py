@@ -1,112 +1,234 @@
-import openai
 import os
+import time
+from datetime import date
 from dotenv import load_dotenv
-from backend.services.recommender import retrieve_context
-from backend.data.psychology_knowledge import get_psychology_context
+from backend.models.user import db, ChatSession, ChatMessage
+from backend.services.recommender import gather_context
+from backend.data.psychology_knowledge import get_psychology_blocks, flatten_blocks, PSYCHOLOGY_KEYWORDS
+from backend.services.prompt_builder import build_prompt
+from backend.services.mood_rollups import recent_mood_summary
+from backend.services.mood_anomaly import recent_alert_lines
+from backend.utils.keyword_matcher import KeywordMatcher
+from backend.utils.resilience import get_breaker, CircuitOpenError
+from backend.utils.singleflight import get_group, normalize_key_text
 
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client
-client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# OpenAI client, created on first use (see get_client)
+client = None
+
+
+def get_client():
+    global client
+    if client is None:
+        import openai
+        client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return client
+
+
+CHAT_TIMEOUT = float(os.getenv("OPENAI_CHAT_TIMEOUT_SECONDS", "20"))
+# Once OpenAI keeps failing or stalling, chat goes straight to the fallback replies
+chat_breaker = get_breaker(
+    "openai-chat",
+    slow_call_seconds=float(os.getenv("OPENAI_CHAT_SLOW_SECONDS", "12"))
+)
+
+# Double-submitted messages share the in-flight retrieval and reply
+context_flight = get_group("chat_context")
+reply_flight = get_group("chat_reply")
+
+# Keyword sets behind the fallback replies, in the order they are checked
+FATIGUE_WORDS = frozenset(['tired', 'exhausted', 'fatigue'])
+SAD_WORDS = frozenset(['sad', 'depressed', 'down', 'blue'])
+ANXIOUS_WORDS = frozenset(['anxious', 'worried', 'nervous', 'stressed'])
+OVERWHELMED_WORDS = frozenset(['overwhelmed', 'stressed', 'pressure'])
+MOOD_WORDS = frozenset(['mood', 'feel', 'feeling', 'today', 'log'])
+HELP_WORDS = frozenset(['help', 'support', 'advice'])
+GREETING_WORDS = frozenset(['hello', 'hi', 'hey', 'good morning', 'good afternoon', 'good evening'])
+
+# Compiled once at import: one pass over the message finds every keyword
+KEYWORD_MATCHER = KeywordMatcher(PSYCHOLOGY_KEYWORDS)
+FALLBACK_MATCHER = KeywordMatcher(
+    FATIGUE_WORDS | SAD_WORDS | ANXIOUS_WORDS | OVERWHELMED_WORDS
+    | MOOD_WORDS | HELP_WORDS | GREETING_WORDS
+)
 
 
 def extract_keywords(text):
     """Extract relevant keywords from user input for psychology knowledge lookup"""
-    # Common mental health and psychology keywords
-    psychology_keywords = [
-        'anxiety', 'depression', 'stress', 'worry', 'nervous', 'panic', 'fear',
-        'sad', 'hopeless', 'worthless', 'empty', 'lonely', 'isolated',
-        'angry', 'irritated', 'frustrated', 'overwhelmed', 'burnout',
-        'sleep', 'insomnia', 'fatigue', 'tired', 'exhausted',
-        'concentration', 'focus', 'memory', 'confused', 'scattered',
-        'relationships', 'social', 'friends', 'family', 'communication',
-        'work', 'job', 'career', 'performance', 'deadline', 'pressure',
-        'mindfulness', 'meditation', 'breathing', 'relaxation', 'calm',
-        'therapy', 'counseling', 'treatment', 'help', 'support',
-        'self-care', 'wellness', 'mental health', 'emotional', 'feelings',
-        'thoughts', 'thinking', 'rumination', 'overthinking', 'negative',
-        'positive', 'gratitude', 'happiness', 'joy', 'contentment',
-        'trauma', 'ptsd', 'grief', 'loss', 'bereavement', 'crisis'
-    ]
-    
-    text_lower = text.lower()
-    found_keywords = []
-    
-    for keyword in psychology_keywords:
-        if keyword in text_lower:
-            found_keywords.append(keyword)
-    
-    return found_keywords
+    return KEYWORD_MATCHER.find_ordered(text)
+
+
+def _gather_contexts(user_id, user_input):
+    return context_flight.do(
+        (user_id, "context", normalize_key_text(user_input)),
+        _run_context_stages, user_id, user_input
+    )
+
+
+def _run_context_stages(user_id, user_input):
+    """Mood retrieval, the 7-day mood rollup, recent mood alerts and the psychology
+    knowledge lookup, run concurrently"""
+    contexts, run = gather_context(
+        user_id, user_input,
+        extra_stages={
+            "psychology": lambda: get_psychology_blocks(extract_keywords(user_input)),
+            "mood_summary": lambda: recent_mood_summary(user_id),
+            "mood_alerts": lambda: recent_alert_lines(user_id)
+        }
+    )
+    mood_signals = {"summary": run.get("mood_summary"), "alerts": run.get("mood_alerts") or []}
+    return contexts, run.get("psychology") or [], mood_signals
+
+
+def build_messages(user_input, contexts, psychology_blocks, mood_signals=None):
+    mood_signals = mood_signals or {}
+    messages, usage = build_prompt(
+        user_input, contexts, psychology_blocks,
+        mood_summary=mood_signals.get("summary"), mood_alerts=mood_signals.get("alerts")
+    )
+    print(f"Prompt tokens: {usage}")
+    return messages
 
 
 def generate_response(user_id, user_input):
+    return reply_flight.do(
+        (user_id, "reply", normalize_key_text(user_input)),
+        _generate_response, user_id, user_input
+    )
+
+
+def _generate_response(user_id, user_input):
+    contexts = []
+    psychology_blocks = []
     try:
-        contexts = retrieve_context(user_id, user_input)
-        
-        # Extract keywords from user input for psychology knowledge
-        keywords = extract_keywords(user_input)
-        psychology_context = get_psychology_context(keywords)
+        contexts, psychology_blocks, mood_signals = _gather_contexts(user_id, user_input)
         
         # If no OpenAI API key, provide a helpful response without AI
         if not os.getenv("OPENAI_API_KEY"):
             return provide_fallback_response(
-                user_input, contexts, psychology_context
-            )
-        
-        # Combine all contexts
-        all_contexts = []
-        if contexts:
-            all_contexts.append(
-                f"User's Mood History:\n{chr(10).join(contexts)}"
+                user_input, contexts, flatten_blocks(psychology_blocks)
             )
-        if psychology_context:
-            all_contexts.append(
-                f"Psychology Knowledge:\n{chr(10).join(psychology_context)}"
-            )
-        
-        context_text = (
-            "\n\n".join(all_contexts) if all_contexts else "No context available."
-        )
-
-        prompt = (
-            "You are a supportive mental health assistant with expertise in "
-            "psychology and evidence-based therapeutic techniques. "
-            "Be empathetic, encouraging, and helpful. Use the provided context "
-            "to give personalized, professional advice. "
-            "Reference specific psychological principles and evidence-based "
-            "techniques when appropriate. "
-            "Always encourage professional help when needed and provide "
-            "practical, actionable advice.\n"
-            "---\n"
-            f"Context:\n{context_text}\n"
-            "---\n"
-            f"User Message: {user_input}\n"
-            "---\n"
-            "Provide a helpful, personalized response based on the psychology "
-            "knowledge and user context above:"
-        )
 
-        response = client.chat.completions.create(
+        response = chat_breaker.call(
+            get_client().chat.completions.create,
             model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
+            messages=build_messages(user_input, contexts, psychology_blocks, mood_signals),
             temperature=0.7,
-            timeout=20,
+            timeout=CHAT_TIMEOUT,
         )
         return response.choices[0].message.content.strip()
+    except CircuitOpenError:
+        return provide_fallback_response(
+            user_input, contexts, flatten_blocks(psychology_blocks)
+        )
     except Exception as e:
         print(f"OpenAI API error: {e}")
         print(f"Error type: {type(e)}")
         import traceback
         traceback.print_exc()
         return provide_fallback_response(
-            user_input, [], psychology_context
+            user_input, [], flatten_blocks(psychology_blocks)
+        )
+
+
+def stream_response(user_id, user_input):
+    """Yield the reply in pieces as the model produces them.
+
+    Falls back to a single provide_fallback_response chunk when OpenAI is
+    unavailable. If the stream breaks after tokens were sent, it just ends
+    so the partial reply is not followed by an unrelated fallback.
+    """
+    contexts = []
+    psychology_blocks = []
+    sent_any = False
+    try:
+        contexts, psychology_blocks, mood_signals = _gather_contexts(user_id, user_input)
+
+        if not os.getenv("OPENAI_API_KEY"):
+            yield provide_fallback_response(user_input, contexts, flatten_blocks(psychology_blocks))
+            return
+
+        client = get_client()
+        if not chat_breaker.allow_request():
+            raise CircuitOpenError(chat_breaker.name)
+        # The whole stream is one call to the breaker: a single outcome, timed over every chunk,
+        # is recorded once the stream ends, fails, or is closed by the consumer
+        started = time.monotonic()
+        failed = False
+        try:
+            stream = client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=build_messages(user_input, contexts, psychology_blocks, mood_signals),
+                temperature=0.7,
+                timeout=CHAT_TIMEOUT,
+                stream=True,
+            )
+            for chunk in stream:
+                token = chunk.choices[0].delta.content if chunk.choices else None
+                if token:
+                    sent_any = True
+                    yield token
+        except Exception:
+            failed = True
+            chat_breaker.record_failure(time.monotonic() - started)
+            raise
+        finally:
+            if not failed:
+                chat_breaker.record_success(time.monotonic() - started)
+    except CircuitOpenError:
+        yield provide_fallback_response(user_input, contexts, flatten_blocks(psychology_blocks))
+    except Exception as e:
+        print(f"OpenAI streaming error: {e}")
+        if not sent_any:
+            yield provide_fallback_response(user_input, [], flatten_blocks(psychology_blocks))
+
+
+def persist_chat_exchange(user_id, message, reply):
+    """Store a user message and the bot reply in today's chat session"""
+    # Get or create today's chat session
+    today = date.today()
+    session = ChatSession.query.filter_by(user_id=user_id, date=today).first()
+    
+    if not session:
+        # Create new session for today
+        session = ChatSession(
+            user_id=user_id,
+            title=f'Conversation - {today.strftime("%B %d, %Y")}',
+            date=today
         )
+        db.session.add(session)
+        db.session.flush()  # Get the session ID
+    
+    # Save user message
+    user_msg = ChatMessage(
+        session_id=session.id,
+        content=message,
+        message_type='user'
+    )
+    db.session.add(user_msg)
+    
+    # Save bot response
+    bot_msg = ChatMessage(
+        session_id=session.id,
+        content=reply,
+        message_type='bot'
+    )
+    db.session.add(bot_msg)
+    db.session.flush()
+    
+    # Update session summary and timestamp
+    session.record_messages(user_msg, bot_msg)
+    
+    db.session.commit()
+    return session
 
 
 def provide_fallback_response(user_input, contexts, psychology_context=None):
     """Provide helpful responses without AI when API is unavailable"""
-    user_lower = user_input.lower()
+    found = FALLBACK_MATCHER.find(user_input)
+    context_set = set(contexts)
     
     # Natural mood context integration
     mood_intro = ""
@@ -128,7 +250,7 @@ def provide_fallback_response(user_input, contexts, psychology_context=None):
         )
     
     # More natural, conversational responses
-    if any(word in user_lower for word in ['tired', 'exhausted', 'fatigue']):
+    if found & FATIGUE_WORDS:
         return (
             f"{mood_intro}Fatigue can really take a toll on both your body and mind. "
             "Sometimes it's our body's way of telling us to slow down. Try to get "
@@ -138,8 +260,7 @@ def provide_fallback_response(user_input, contexts, psychology_context=None):
             "sometimes there's more to it than just being busy."
         )
     
-    elif (any(word in user_lower for word in ['sad', 'depressed', 'down', 'blue']) or
-          any(word in contexts for word in ['sad', 'down', 'depressed'])):
+    elif found & SAD_WORDS or context_set & {'sad', 'down', 'depressed'}:
         return (
             f"{mood_intro}It sounds like you're going through a tough time, and I want "
             "you to know that what you're feeling is valid. Sometimes the best thing "
@@ -149,8 +270,7 @@ def provide_fallback_response(user_input, contexts, psychology_context=None):
             "shows incredible strength, not weakness."
         )
     
-    elif (any(word in user_lower for word in ['anxious', 'worried', 'nervous', 'stressed']) or
-          any(word in contexts for word in ['anxious', 'worried', 'stressed'])):
+    elif found & ANXIOUS_WORDS or context_set & {'anxious', 'worried', 'stressed'}:
         return (
             f"{mood_intro}Anxiety can feel overwhelming, but there are some simple "
             "techniques that might help. Try the 4-7-8 breathing: breathe in for 4 "
@@ -160,8 +280,7 @@ def provide_fallback_response(user_input, contexts, psychology_context=None):
             "bring you back to the present moment when anxiety feels too big."
         )
     
-    elif (any(word in user_lower for word in ['overwhelmed', 'stressed', 'pressure']) or
-          any(word in contexts for word in ['overwhelmed', 'stressed'])):
+    elif found & OVERWHELMED_WORDS or context_set & {'overwhelmed', 'stressed'}:
         return (
             f"{mood_intro}When everything feels like too much, it's okay to step back "
             "and take things one piece at a time. Try writing down everything on your "
@@ -170,8 +289,7 @@ def provide_fallback_response(user_input, contexts, psychology_context=None):
             "it's not selfish to take care of yourself; it's necessary."
         )
     
-    elif (any(word in user_lower for word in ['mood', 'feel', 'feeling', 'today', 'log']) or
-          'mood' in contexts):
+    elif found & MOOD_WORDS or 'mood' in context_set:
         return (
             f"{mood_intro}I really appreciate that you're taking the time to check in "
             "with yourself - that's such an important part of mental wellness. "
@@ -181,7 +299,7 @@ def provide_fallback_response(user_input, contexts, psychology_context=None):
             "them with someone you trust or a mental health professional."
         )
     
-    elif any(word in user_lower for word in ['help', 'support', 'advice']):
+    elif found & HELP_WORDS:
         return (
             f"{mood_intro}I'm glad you're reaching out. Sometimes just talking about "
             "what's on your mind can make a big difference. If you're going through "
@@ -191,7 +309,7 @@ def provide_fallback_response(user_input, contexts, psychology_context=None):
             "you can do."
         )
     
-    elif any(word in user_lower for word in ['hello', 'hi', 'hey', 'good morning', 'good afternoon', 'good evening']):
+    elif found & GREETING_WORDS:
         return (
             f"Hello! {mood_intro}I'm here to listen and support you however I can. "
             "How are you doing today?"
@@ -0,0 +1,57 @@
+from sqlalchemy import bindparam, func, select
+from backend.models.user import ChatSession, ChatMessage, message_preview
+
+
+def backfill_session_summaries(connection, batch_size=500):
+    """Recompute message_count, last_message_at and last_message_preview of every chat session"""
+    sessions = ChatSession.__table__
+    messages = ChatMessage.__table__
+
+    totals = {
+        row.session_id: row
+        for row in connection.execute(
+            select(
+                messages.c.session_id,
+                func.count(messages.c.id).label("message_count"),
+                func.max(messages.c.id).label("last_id"),
+            ).group_by(messages.c.session_id)
+        )
+    }
+
+    session_ids = [row[0] for row in connection.execute(select(sessions.c.id))]
+    update = (
+        sessions.update()
+        .where(sessions.c.id == bindparam("session_id"))
+        .values(
+            # Set explicitly so the column's onupdate doesn't stamp every session with "now"
+            updated_at=sessions.c.updated_at,
+            message_count=bindparam("count"),
+            last_message_at=bindparam("last_at"),
+            last_message_preview=bindparam("preview"),
+        )
+    )
+
+    updated = 0
+    for start in range(0, len(session_ids), batch_size):
+        batch = session_ids[start:start + batch_size]
+        last_ids = [totals[sid].last_id for sid in batch if sid in totals]
+        last_messages = {
+            row.session_id: row
+            for row in connection.execute(
+                select(messages.c.session_id, messages.c.content, messages.c.created_at)
+                .where(messages.c.id.in_(last_ids))
+            )
+        } if last_ids else {}
+
+        params = []
+        for sid in batch:
+            last = last_messages.get(sid)
+            params.append({
+                "session_id": sid,
+                "count": totals[sid].message_count if sid in totals else 0,
+                "last_at": last.created_at if last else None,
+                "preview": message_preview(last.content) if last else None,
+            })
+        connection.execute(update, params)
+        updated += len(batch)
+    return updated
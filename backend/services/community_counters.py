@@ -0,0 +1,148 @@
+import atexit
+import os
+import threading
+import time
+from collections import defaultdict
+from sqlalchemy import event, func, select
+from backend.models.user import db, CommunityPost, PostComment, PostLike, CommentLike
+from backend.utils.db import RoutingSession
+from backend.services.hot_ranking import refresh_hot_scores
+
+# 0 applies every counter change in the request's own transaction; above 0, changes are
+# summed in memory after commit and written every this many milliseconds
+FLUSH_INTERVAL_MS = int(os.getenv("COUNTER_FLUSH_MS", "0"))
+
+
+def adjust(column, row_id, delta):
+    """Add `delta` to a counter column of one row with an atomic SQL increment.
+
+    Unbuffered the UPDATE joins the caller's transaction; buffered the delta is
+    held until that transaction commits (and dropped if it rolls back). A
+    post's hot score is refreshed whenever one of its counters is written.
+    """
+    table = column.class_.__table__
+    if FLUSH_INTERVAL_MS > 0:
+        db.session.info.setdefault("counter_deltas", []).append((table.name, column.key, row_id, delta))
+        return
+    db.session.execute(
+        table.update().where(table.c.id == row_id).values({column.key: table.c[column.key] + delta})
+    )
+    if table.name == CommunityPost.__table__.name:
+        refresh_hot_scores(db.session.connection(), [row_id])
+
+
+class CounterBuffer:
+    """Committed counter deltas, coalesced per (table, column, row) until the next flush"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._deltas = defaultdict(int)
+        self.flushed_updates = 0
+
+    def add(self, table_name, column_name, row_id, delta):
+        with self._lock:
+            self._deltas[(table_name, column_name, row_id)] += delta
+
+    def flush(self):
+        """Write the pending deltas in one transaction; returns the number of rows updated"""
+        with self._lock:
+            pending, self._deltas = self._deltas, defaultdict(int)
+        pending = {key: delta for key, delta in pending.items() if delta}
+        if not pending:
+            return 0
+        try:
+            with db.engine.begin() as connection:
+                for (table_name, column_name, row_id), delta in pending.items():
+                    table = db.metadata.tables[table_name]
+                    connection.execute(
+                        table.update().where(table.c.id == row_id)
+                        .values({column_name: table.c[column_name] + delta})
+                    )
+                refresh_hot_scores(connection, {
+                    row_id for table_name, _, row_id in pending
+                    if table_name == CommunityPost.__table__.name
+                })
+        except Exception as e:
+            print(f"Counter flush failed, retrying next time: {e}")
+            with self._lock:
+                for key, delta in pending.items():
+                    self._deltas[key] += delta
+            return 0
+        self.flushed_updates += len(pending)
+        return len(pending)
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._deltas)
+        return {"pending_rows": pending, "flushed_updates": self.flushed_updates}
+
+
+counter_buffer = CounterBuffer()
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _buffer_committed_deltas(session):
+    for table_name, column_name, row_id, delta in session.info.pop("counter_deltas", []):
+        counter_buffer.add(table_name, column_name, row_id, delta)
+
+
+@event.listens_for(RoutingSession, "after_soft_rollback")
+def _drop_rolled_back_deltas(session, previous_transaction):
+    session.info.pop("counter_deltas", None)
+
+
+def start_counter_flusher(app):
+    """Flush the buffer every FLUSH_INTERVAL_MS in a daemon thread, and once more at exit"""
+    def flush():
+        with app.app_context():
+            counter_buffer.flush()
+
+    def loop():
+        while True:
+            time.sleep(FLUSH_INTERVAL_MS / 1000)
+            flush()
+
+    atexit.register(flush)
+    thread = threading.Thread(target=loop, name="counter-flusher", daemon=True)
+    thread.start()
+    return thread
+
+
+# (counter column, table holding the rows it counts, that table's foreign key to the counter's row)
+COUNTERS = (
+    (CommunityPost.likes_count, PostLike, PostLike.post_id),
+    (CommunityPost.comments_count, PostComment, PostComment.post_id),
+    (PostComment.likes_count, CommentLike, CommentLike.comment_id),
+)
+
+
+def reconcile_counters(engine, batch_size=500):
+    """Recompute every counter from the like/comment rows, one id range per transaction.
+
+    Only drifted rows are written; returns {counter name: rows fixed}. Deltas
+    still in a process's buffer may be counted twice and are fixed on the next run.
+    """
+    fixed = {}
+    for column, source, foreign_key in COUNTERS:
+        model = column.class_
+        table = model.__table__
+        name = f"{table.name}.{column.key}"
+        fixed[name] = 0
+        actual = (
+            select(func.count()).select_from(source.__table__)
+            .where(foreign_key == table.c.id)
+            .scalar_subquery()
+        )
+        with engine.connect() as connection:
+            max_id = connection.execute(select(func.max(table.c.id))).scalar() or 0
+        for low in range(1, max_id + 1, batch_size):
+            high = low + batch_size - 1
+            with engine.begin() as connection:
+                result = connection.execute(
+                    table.update()
+                    .where(table.c.id.between(low, high),
+                           func.coalesce(table.c[column.key], -1) != actual)
+                    .values({column.key: actual})
+                )
+                fixed[name] += result.rowcount or 0
+    return fixed
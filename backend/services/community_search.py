@@ -0,0 +1,156 @@
+from datetime import datetime
+from sqlalchemy import inspect
+from backend.models.user import db
+from backend.utils.fts import (
+    MARK_START, MARK_END, fts5_available, fts5_query, query_terms, highlight_excerpt, render_snippet
+)
+
+SEARCH_TYPES = ('all', 'posts', 'comments')
+# Tie-break between a post and a comment with the same score
+KIND_ORDER = {'post': 0, 'comment': 1}
+KINDS = {order: kind for kind, order in KIND_ORDER.items()}
+# Title matches weigh twice as much as body matches
+POST_WEIGHTS = "2.0, 1.0"
+SNIPPET_TOKENS = 16
+
+# Search backend per database URL: fts5, fulltext or like
+_backends = {}
+
+
+def search_backend():
+    url = str(db.engine.url)
+    if url not in _backends:
+        with db.engine.connect() as connection:
+            if fts5_available(connection) and inspect(connection).has_table("community_post_fts"):
+                _backends[url] = "fts5"
+            elif connection.dialect.name == "mysql":
+                _backends[url] = "fulltext"
+            else:
+                _backends[url] = "like"
+    return _backends[url]
+
+
+def _fts5_selects(types, category_filter):
+    snippet = f":mark_start, :mark_end, '…', {SNIPPET_TOKENS}"
+    selects = []
+    if types in ('all', 'posts'):
+        selects.append(
+            f"SELECT {KIND_ORDER['post']} AS kind_order, p.id AS id, p.id AS post_id, p.title AS title, "
+            f"p.category AS category, p.created_at AS created_at, "
+            f"snippet(community_post_fts, -1, {snippet}) AS snippet, "
+            f"bm25(community_post_fts, {POST_WEIGHTS}) AS score "
+            f"FROM community_post_fts JOIN community_post p ON p.id = community_post_fts.rowid "
+            f"WHERE community_post_fts MATCH :match{category_filter}"
+        )
+    if types in ('all', 'comments'):
+        selects.append(
+            f"SELECT {KIND_ORDER['comment']} AS kind_order, c.id AS id, c.post_id AS post_id, p.title AS title, "
+            f"p.category AS category, c.created_at AS created_at, "
+            f"snippet(post_comment_fts, 0, {snippet}) AS snippet, bm25(post_comment_fts) AS score "
+            f"FROM post_comment_fts JOIN post_comment c ON c.id = post_comment_fts.rowid "
+            f"JOIN community_post p ON p.id = c.post_id "
+            f"WHERE post_comment_fts MATCH :match{category_filter}"
+        )
+    return selects
+
+
+def _fulltext_selects(types, category_filter):
+    # MySQL scores grow with relevance; negated so every backend sorts ascending
+    post_match = "MATCH(p.title, p.content) AGAINST (:match IN BOOLEAN MODE)"
+    comment_match = "MATCH(c.content) AGAINST (:match IN BOOLEAN MODE)"
+    selects = []
+    if types in ('all', 'posts'):
+        selects.append(
+            f"SELECT {KIND_ORDER['post']} AS kind_order, p.id AS id, p.id AS post_id, p.title AS title, "
+            f"p.category AS category, p.created_at AS created_at, p.content AS body, -{post_match} AS score "
+            f"FROM community_post p WHERE {post_match}{category_filter}"
+        )
+    if types in ('all', 'comments'):
+        selects.append(
+            f"SELECT {KIND_ORDER['comment']} AS kind_order, c.id AS id, c.post_id AS post_id, p.title AS title, "
+            f"p.category AS category, c.created_at AS created_at, c.content AS body, -{comment_match} AS score "
+            f"FROM post_comment c JOIN community_post p ON p.id = c.post_id "
+            f"WHERE {comment_match}{category_filter}"
+        )
+    return selects
+
+
+def _like_selects(types, category_filter, term_count):
+    # No index to rank with: newest first, the slow path for other databases
+    def matches(*columns):
+        return " AND ".join(
+            "(" + " OR ".join(f"lower({column}) LIKE :term{i} ESCAPE '\\'" for column in columns) + ")"
+            for i in range(term_count)
+        )
+    selects = []
+    if types in ('all', 'posts'):
+        selects.append(
+            f"SELECT {KIND_ORDER['post']} AS kind_order, p.id AS id, p.id AS post_id, p.title AS title, "
+            f"p.category AS category, p.created_at AS created_at, p.content AS body, -p.id AS score "
+            f"FROM community_post p WHERE {matches('p.title', 'p.content')}{category_filter}"
+        )
+    if types in ('all', 'comments'):
+        selects.append(
+            f"SELECT {KIND_ORDER['comment']} AS kind_order, c.id AS id, c.post_id AS post_id, p.title AS title, "
+            f"p.category AS category, c.created_at AS created_at, c.content AS body, -c.id AS score "
+            f"FROM post_comment c JOIN community_post p ON p.id = c.post_id "
+            f"WHERE {matches('c.content')}{category_filter}"
+        )
+    return selects
+
+
+def search_community(text, category=None, types='all', limit=20, after=None):
+    """Posts and comments matching `text`, best first; returns (hits, key of the next page).
+
+    Page keys are (score, kind order, id) of a page's last hit; the next key
+    is None on the last page.
+    """
+    terms = query_terms(text)
+    backend = search_backend()
+    params = {'limit': limit + 1}
+    category_filter = ""
+    if category and category != 'all':
+        category_filter = " AND p.category = :category"
+        params['category'] = category
+
+    if backend == "fts5":
+        params.update(match=fts5_query(text), mark_start=MARK_START, mark_end=MARK_END)
+        selects = _fts5_selects(types, category_filter)
+    elif backend == "fulltext":
+        params['match'] = " ".join(f"+{term}" for term in terms[:-1]) + f" +{terms[-1]}*"
+        selects = _fulltext_selects(types, category_filter)
+    else:
+        for i, term in enumerate(terms):
+            params[f'term{i}'] = "%" + term.replace("\\", "\\\\").replace("_", "\\_") + "%"
+        selects = _like_selects(types, category_filter, len(terms))
+
+    seek = ""
+    if after:
+        seek = " WHERE (score, kind_order, id) > (:after_score, :after_kind, :after_id)"
+        params.update(after_score=after[0], after_kind=after[1], after_id=after[2])
+    sql = (
+        f"SELECT * FROM ({' UNION ALL '.join(selects)}) hits{seek} "
+        "ORDER BY score, kind_order, id LIMIT :limit"
+    )
+    rows = db.session.execute(db.text(sql), params).mappings().all()
+
+    hits = []
+    for row in rows[:limit]:
+        raw = row['snippet'] if backend == "fts5" else highlight_excerpt(row['body'], terms)
+        created_at = row['created_at']
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        hits.append({
+            'type': KINDS[row['kind_order']],
+            'id': row['id'],
+            'post_id': row['post_id'],
+            'post_title': row['title'],
+            'category': row['category'],
+            'snippet': render_snippet(raw),
+            'created_at': created_at.isoformat() if created_at else None
+        })
+    next_key = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_key = (last['score'], last['kind_order'], last['id'])
+    return hits, next_key
@@ -0,0 +1,35 @@
+import math
+from datetime import datetime
+from sqlalchemy import bindparam, select
+from backend.models.user import CommunityPost
+
+# score = log10(max(likes + COMMENT_WEIGHT * comments, 1)) + (created_at - EPOCH) / DECAY_SECONDS
+# Newer posts start higher, so a stored score never needs aging: ten times the engagement
+# is worth DECAY_SECONDS (12.5 hours) of recency, and only likes and comments rewrite it
+COMMENT_WEIGHT = 2
+DECAY_SECONDS = 45000
+EPOCH = datetime(2024, 1, 1)
+
+_posts = CommunityPost.__table__
+
+
+def hot_score(likes, comments, created_at):
+    engagement = (likes or 0) + COMMENT_WEIGHT * (comments or 0)
+    return math.log10(max(engagement, 1)) + (created_at - EPOCH).total_seconds() / DECAY_SECONDS
+
+
+def refresh_hot_scores(connection, post_ids):
+    """Recompute the score of these posts from their current counts; returns posts updated"""
+    if not post_ids:
+        return 0
+    rows = connection.execute(
+        select(_posts.c.id, _posts.c.likes_count, _posts.c.comments_count, _posts.c.created_at)
+        .where(_posts.c.id.in_(list(post_ids)))
+    ).all()
+    if rows:
+        connection.execute(
+            _posts.update().where(_posts.c.id == bindparam('post_id')).values(hot_score=bindparam('score')),
+            [{'post_id': row.id, 'score': hot_score(row.likes_count, row.comments_count, row.created_at)}
+             for row in rows]
+        )
+    return len(rows)
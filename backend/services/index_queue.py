@@ -0,0 +1,175 @@
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from backend.models.user import db, MoodEntry, MoodIndexJob
+from backend.services.mood_indexer import index_moods
+from backend.utils.pinecone import delete_embeddings
+
+MAX_ATTEMPTS = int(os.getenv("INDEX_JOB_MAX_ATTEMPTS", "8"))
+BACKOFF_BASE_SECONDS = float(os.getenv("INDEX_JOB_BACKOFF_SECONDS", "5"))
+BACKOFF_MAX_SECONDS = float(os.getenv("INDEX_JOB_BACKOFF_MAX_SECONDS", "900"))
+# Jobs stuck in "running" this long are assumed to belong to a dead worker
+STALE_LOCK_SECONDS = int(os.getenv("INDEX_JOB_STALE_SECONDS", "300"))
+
+
+def enqueue_mood_index(mood, action='upsert'):
+    """Queue vector work for a mood in the caller's transaction (caller commits)"""
+    job = MoodIndexJob(mood_id=mood.id, user_id=mood.user_id, action=action)
+    db.session.add(job)
+    return job
+
+
+def claim_jobs(limit=100):
+    """Mark up to `limit` due jobs as running and return them"""
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=STALE_LOCK_SECONDS)
+    candidates = (
+        MoodIndexJob.query.filter(
+            db.or_(
+                db.and_(MoodIndexJob.status == 'pending', MoodIndexJob.run_after <= now),
+                db.and_(MoodIndexJob.status == 'running', MoodIndexJob.locked_at < stale)
+            )
+        )
+        .order_by(MoodIndexJob.run_after.asc(), MoodIndexJob.id.asc())
+        .limit(limit)
+        .all()
+    )
+
+    claimed_ids = []
+    for job in candidates:
+        # Conditional update so two workers never claim the same job
+        updated = MoodIndexJob.query.filter(
+            MoodIndexJob.id == job.id,
+            MoodIndexJob.status == job.status,
+            MoodIndexJob.locked_at == job.locked_at
+        ).update({'status': 'running', 'locked_at': now}, synchronize_session=False)
+        if updated:
+            claimed_ids.append(job.id)
+    db.session.commit()
+
+    if not claimed_ids:
+        return []
+    return MoodIndexJob.query.filter(MoodIndexJob.id.in_(claimed_ids)).all()
+
+
+def _backoff_seconds(attempts):
+    delay = min(BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)), BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _finish(jobs, error=None):
+    now = datetime.utcnow()
+    for job in jobs:
+        if error is None:
+            # Finished jobs are dropped so the table only holds outstanding work
+            db.session.delete(job)
+            continue
+        job.locked_at = None
+        job.attempts += 1
+        job.last_error = str(error)[:2000]
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = 'failed'
+        else:
+            job.status = 'pending'
+            job.run_after = now + timedelta(seconds=_backoff_seconds(job.attempts))
+
+
+def process_jobs(jobs, embed_batch_size=100, upsert_batch_size=100, workers=4):
+    """Run claimed jobs in batches; failures are retried with exponential backoff"""
+    if not jobs:
+        return 0
+
+    upserts = [job for job in jobs if job.action == 'upsert']
+    deletes = [job for job in jobs if job.action == 'delete']
+
+    if upserts:
+        moods = MoodEntry.query.filter(
+            MoodEntry.id.in_({job.mood_id for job in upserts})
+        ).all()
+        with_note = [m for m in moods if m.note]
+        # A mood whose note was cleared must not keep an old vector around
+        cleared = defaultdict(list)
+        for m in moods:
+            if not m.note:
+                cleared[m.user_id].append(m.id)
+        try:
+            index_moods(
+                with_note,
+                embed_batch_size=embed_batch_size,
+                upsert_batch_size=upsert_batch_size,
+                workers=workers
+            )
+            for user_id, mood_ids in cleared.items():
+                delete_embeddings(user_id, mood_ids)
+            _finish(upserts)
+        except Exception as e:
+            print(f"Mood index batch failed: {e}")
+            _finish(upserts, error=e)
+
+    by_user = defaultdict(list)
+    for job in deletes:
+        by_user[job.user_id].append(job)
+    for user_id, user_jobs in by_user.items():
+        try:
+            delete_embeddings(user_id, {job.mood_id for job in user_jobs})
+            _finish(user_jobs)
+        except Exception as e:
+            print(f"Mood vector delete failed for user {user_id}: {e}")
+            _finish(user_jobs, error=e)
+
+    db.session.commit()
+    return len(jobs)
+
+
+def run_worker(batch_size=100, poll_interval=2.0, once=False, stop_event=None):
+    """Claim and process jobs until stopped; must run inside an app context"""
+    while stop_event is None or not stop_event.is_set():
+        try:
+            jobs = claim_jobs(limit=batch_size)
+            processed = process_jobs(jobs)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Index worker error: {e}")
+            processed = 0
+        finally:
+            db.session.remove()
+        if once and not processed:
+            return
+        if not processed:
+            time.sleep(poll_interval)
+
+
+def start_background_worker(app, **kwargs):
+    """Run the worker loop in a daemon thread of this process"""
+    def target():
+        with app.app_context():
+            run_worker(**kwargs)
+
+    thread = threading.Thread(target=target, name="index-worker", daemon=True)
+    thread.start()
+    return thread
+
+
+def queue_stats():
+    counts = dict(
+        db.session.query(MoodIndexJob.status, func.count(MoodIndexJob.id))
+        .group_by(MoodIndexJob.status)
+        .all()
+    )
+    oldest_pending = (
+        db.session.query(func.min(MoodIndexJob.created_at))
+        .filter(MoodIndexJob.status.in_(['pending', 'running']))
+        .scalar()
+    )
+    lag = (datetime.utcnow() - oldest_pending).total_seconds() if oldest_pending else 0.0
+    return {
+        "depth": counts.get('pending', 0) + counts.get('running', 0),
+        "pending": counts.get('pending', 0),
+        "running": counts.get('running', 0),
+        "failed": counts.get('failed', 0),
+        "lag_seconds": round(lag, 1)
+    }
@@ -0,0 +1,174 @@
+import math
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from backend.models.user import db, MoodEntry, MoodSignalState, MoodAlert, CoachingSession
+from backend.services.mood_rollups import LEVEL_SCORES, DEFAULT_SCORE
+
+# Smoothing of the recent level and of the usual level (and its variance)
+FAST_ALPHA = 0.3
+SLOW_ALPHA = 0.05
+# No drop or shift alerts until the baseline has seen this many moods
+MIN_ENTRIES = int(os.getenv("MOOD_ALERT_MIN_ENTRIES", "5"))
+# Sudden drop: at least DROP_POINTS below the baseline and DROP_Z deviations away,
+# coming off a mood above "poor" (lows that follow are the low streak's business)
+DROP_POINTS = 1.5
+DROP_Z = float(os.getenv("MOOD_ALERT_DROP_Z", "2.0"))
+MIN_STD = 0.5
+# Downward shift: recent level this far under the baseline; clears at half of it
+SHIFT_POINTS = 1.0
+# Low streak: this many consecutive moods at "poor" or worse
+LOW_SCORE = LEVEL_SCORES['poor']
+LOW_RUN = int(os.getenv("MOOD_ALERT_LOW_RUN", "3"))
+# Alerts older than this are left out of the chat prompt
+PROMPT_ALERT_DAYS = 7
+
+
+def _initial_state():
+    return SimpleNamespace(
+        count=0, mean=0.0, baseline=0.0, variance=0.0, low_run=0, shift_active=False, last_score=None
+    )
+
+
+def step(state, level):
+    """Fold one mood into `state` in constant time; returns [(kind, message)] for anything it flags"""
+    score = LEVEL_SCORES.get(level, DEFAULT_SCORE)
+    alerts = []
+
+    if state.count == 0:
+        state.mean = state.baseline = float(score)
+        state.variance = 0.0
+    else:
+        # Judged against the statistics from before this mood
+        deviation = state.baseline - score
+        std = max(math.sqrt(state.variance), MIN_STD)
+        if (state.count >= MIN_ENTRIES and state.low_run == 0
+                and deviation >= DROP_POINTS and deviation / std >= DROP_Z):
+            alerts.append(('sudden_drop', f"Logged '{level}' against a usual level of {state.baseline:.1f}/5"))
+
+        state.mean += FAST_ALPHA * (score - state.mean)
+        # Incremental exponentially weighted variance (Finch, 2009)
+        diff = score - state.baseline
+        increment = SLOW_ALPHA * diff
+        state.baseline += increment
+        state.variance = (1 - SLOW_ALPHA) * (state.variance + diff * increment)
+    state.count += 1
+
+    gap = state.baseline - state.mean
+    if state.shift_active and gap < SHIFT_POINTS / 2:
+        state.shift_active = False
+    elif not state.shift_active and state.count >= MIN_ENTRIES and gap >= SHIFT_POINTS:
+        state.shift_active = True
+        alerts.append((
+            'downward_shift',
+            f"Recent moods average {state.mean:.1f}/5, down from a usual {state.baseline:.1f}/5"
+        ))
+
+    state.low_run = state.low_run + 1 if score <= LOW_SCORE else 0
+    if state.low_run == LOW_RUN:
+        alerts.append(('low_streak', f"{LOW_RUN} moods in a row at 'poor' or worse"))
+
+    state.last_score = score
+    return alerts
+
+
+def _history_state(user_id, before_mood_id):
+    """State after the user's moods logged before this one (no alerts), for users the detector hasn't seen"""
+    state = _initial_state()
+    levels = (
+        db.session.query(MoodEntry.level)
+        .filter(MoodEntry.user_id == user_id, MoodEntry.id < before_mood_id)
+        .order_by(MoodEntry.timestamp, MoodEntry.id)
+    )
+    for (level,) in levels:
+        step(state, level)
+    return state
+
+
+def _load_state(user_id, mood_id):
+    """The user's state row, locked for this transaction; seeded from their history on first use"""
+    state = MoodSignalState.query.filter_by(user_id=user_id).with_for_update().first()
+    if state:
+        return state
+    state = MoodSignalState(user_id=user_id, **vars(_history_state(user_id, mood_id)))
+    try:
+        with db.session.begin_nested():
+            db.session.add(state)
+    except IntegrityError:
+        # Another request created the row first
+        state = MoodSignalState.query.filter_by(user_id=user_id).with_for_update().first()
+    return state
+
+
+def observe_mood(mood):
+    """Run a flushed mood through the detector; returns the new MoodAlerts (caller commits).
+
+    Edits and deletes are not replayed: the state describes moods as they were logged.
+    """
+    state = _load_state(mood.user_id, mood.id)
+    alerts = []
+    for kind, message in step(state, mood.level):
+        alert = MoodAlert(
+            user_id=mood.user_id, mood_id=mood.id, kind=kind,
+            score=state.last_score, baseline=round(state.baseline, 2), message=message
+        )
+        db.session.add(alert)
+        alerts.append(alert)
+    return alerts
+
+
+def alert_json(alert):
+    return {
+        'id': alert.id,
+        'user_id': alert.user_id,
+        'mood_id': alert.mood_id,
+        'kind': alert.kind,
+        'score': alert.score,
+        'baseline': alert.baseline,
+        'message': alert.message,
+        'created_at': alert.created_at.isoformat()
+    }
+
+
+def notify_coaches(alerts):
+    """Send committed alerts to the `user_{id}` room of each coach with a pending or active session"""
+    if not alerts:
+        return
+    user_id = alerts[0].user_id
+    coach_ids = {
+        coach_id for (coach_id,) in db.session.query(CoachingSession.coach_id)
+        .filter(CoachingSession.client_id == user_id,
+                CoachingSession.status.in_(('pending', 'active')))
+        .distinct()
+    }
+    socketio = current_app.extensions.get('socketio')
+    if not coach_ids or not socketio:
+        return
+    for alert in alerts:
+        for coach_id in coach_ids:
+            try:
+                socketio.emit('mood_alert', alert_json(alert), room=f'user_{coach_id}')
+            except Exception as e:
+                print(f"Could not send mood alert to coach {coach_id}: {e}")
+
+
+def recent_alerts(user_id, days=PROMPT_ALERT_DAYS, limit=3):
+    since = datetime.utcnow() - timedelta(days=days)
+    return (
+        MoodAlert.query
+        .filter(MoodAlert.user_id == user_id, MoodAlert.created_at >= since)
+        .order_by(MoodAlert.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def recent_alert_lines(user_id):
+    """Recent alerts as prompt lines, newest first"""
+    return [
+        f"{alert.message} ({alert.created_at.strftime('%b %d')})"
+        for alert in recent_alerts(user_id)
+    ]
+
@@ -0,0 +1,47 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from backend.utils.auth import get_embeddings
+from backend.utils.pinecone import upsert_embeddings
+
+
+def mood_text(mood):
+    return f"Mood: {mood.level}. Note: {mood.note}"
+
+
+def mood_metadata(mood, text=None):
+    return {
+        "text": text or mood_text(mood),
+        "level": mood.level,
+        "note": mood.note,
+        "timestamp": mood.timestamp.isoformat(),
+        "user_id": mood.user_id,
+        "mood_id": mood.id
+    }
+
+
+def index_moods(moods, embed_batch_size=100, upsert_batch_size=100, workers=4):
+    """Embed and upsert many moods at once.
+
+    Notes are embedded in batches of embed_batch_size per request, then
+    upserted per user namespace with at most `workers` namespaces in flight.
+    Moods without a note are skipped. Returns the number of vectors written.
+    """
+    moods = [m for m in moods if m.note]
+    if not moods:
+        return 0
+
+    texts = [mood_text(m) for m in moods]
+    embeddings = get_embeddings(texts, batch_size=embed_batch_size)
+
+    by_user = defaultdict(list)
+    for mood, text, embedding in zip(moods, texts, embeddings):
+        by_user[mood.user_id].append((mood.id, embedding, mood_metadata(mood, text)))
+
+    def upsert(item):
+        user_id, vectors = item
+        return upsert_embeddings(user_id, vectors, batch_size=upsert_batch_size)
+
+    if len(by_user) == 1 or workers <= 1:
+        return sum(upsert(item) for item in by_user.items())
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(upsert, by_user.items()))
@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, select
+from sqlalchemy.exc import IntegrityError
+from backend.models.user import db, MoodEntry, MoodDailyRollup, MoodWeeklyRollup
+
+# Same scale as the dashboard charts; unknown levels count as "okay"
+LEVEL_SCORES = {'excellent': 5, 'good': 4, 'okay': 3, 'poor': 2, 'terrible': 1}
+DEFAULT_SCORE = 3
+
+
+def level_score():
+    return case(LEVEL_SCORES, value=MoodEntry.level, else_=DEFAULT_SCORE)
+
+
+def bucket_start(period, dialect):
+    """SQL expression for the first day of the day/week (Monday)/month containing a mood"""
+    ts = MoodEntry.timestamp
+    if dialect == 'sqlite':
+        return {
+            'day': func.date(ts),
+            'week': func.date(ts, 'weekday 0', '-6 days'),
+            'month': func.strftime('%Y-%m-01', ts),
+        }[period]
+    if dialect == 'mysql':
+        return {
+            'day': func.date(ts),
+            'week': func.subdate(func.date(ts), func.weekday(ts)),
+            'month': func.date_format(ts, '%Y-%m-01'),
+        }[period]
+    return func.date_trunc(period, ts).cast(db.Date)
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+# (model, key column name, period, key for a mood timestamp)
+ROLLUPS = (
+    (MoodDailyRollup, 'day', 'day', lambda ts: ts.date()),
+    (MoodWeeklyRollup, 'week_start', 'week', lambda ts: week_start(ts.date())),
+)
+
+
+def _apply(user_id, level, timestamp, sign):
+    score = LEVEL_SCORES.get(level, DEFAULT_SCORE)
+    level_column = f"{level}_count" if level in LEVEL_SCORES else None
+
+    for model, key_name, _, key_for in ROLLUPS:
+        filters = {'user_id': user_id, key_name: key_for(timestamp)}
+        # Incremented in SQL so concurrent mood writes don't overwrite each other
+        values = {model.count: model.count + sign, model.score_sum: model.score_sum + sign * score}
+        if level_column:
+            column = getattr(model, level_column)
+            values[column] = column + sign
+
+        if model.query.filter_by(**filters).update(values, synchronize_session=False):
+            if sign < 0:
+                model.query.filter_by(**filters).filter(model.count <= 0).delete(synchronize_session=False)
+            continue
+        if sign < 0:
+            continue
+
+        row = model(count=1, score_sum=score, **filters)
+        if level_column:
+            setattr(row, level_column, 1)
+        try:
+            with db.session.begin_nested():
+                db.session.add(row)
+        except IntegrityError:
+            # Another request created the row first
+            model.query.filter_by(**filters).update(values, synchronize_session=False)
+
+
+def add_mood(mood):
+    """Count a flushed mood in its day and week rollups (caller commits)"""
+    _apply(mood.user_id, mood.level, mood.timestamp, 1)
+
+
+def remove_mood(mood):
+    _apply(mood.user_id, mood.level, mood.timestamp, -1)
+
+
+def change_mood_level(mood, old_level):
+    if old_level != mood.level:
+        _apply(mood.user_id, old_level, mood.timestamp, -1)
+        _apply(mood.user_id, mood.level, mood.timestamp, 1)
+
+
+def rebuild_rollups(connection, user_id=None):
+    """Recompute rollups from MoodEntry with grouped INSERT ... SELECTs; returns rows written"""
+    written = 0
+    for model, key_name, period, _ in ROLLUPS:
+        table = model.__table__
+        delete = table.delete()
+        if user_id:
+            delete = delete.where(table.c.user_id == user_id)
+        connection.execute(delete)
+
+        bucket = bucket_start(period, connection.dialect.name)
+        columns = [
+            MoodEntry.user_id, bucket, func.count(), func.sum(level_score())
+        ] + [
+            func.sum(case((MoodEntry.level == level, 1), else_=0)) for level in LEVEL_SCORES
+        ]
+        source = select(*columns).group_by(MoodEntry.user_id, bucket)
+        if user_id:
+            source = source.where(MoodEntry.user_id == user_id)
+        target = ['user_id', key_name, 'count', 'score_sum'] + [f"{level}_count" for level in LEVEL_SCORES]
+        result = connection.execute(table.insert().from_select(target, source))
+        written += result.rowcount or 0
+    return written
+
+
+def rollup_summary(row):
+    """{count, average_score, levels, most_frequent} for one rollup row (or an aggregate of rows)"""
+    levels = {level: getattr(row, f"{level}_count") or 0 for level in LEVEL_SCORES}
+    count = row.count or 0
+    return {
+        'count': count,
+        'average_score': round(row.score_sum / count, 2) if count else None,
+        'levels': levels,
+        'most_frequent': max(levels, key=levels.get) if count else None
+    }
+
+
+def daily_rollups(user_id, start_day, end_day):
+    """Daily rows for start_day <= day <= end_day, oldest first"""
+    return (
+        MoodDailyRollup.query
+        .filter(MoodDailyRollup.user_id == user_id,
+                MoodDailyRollup.day >= start_day, MoodDailyRollup.day <= end_day)
+        .order_by(MoodDailyRollup.day.asc())
+        .all()
+    )
+
+
+def recent_mood_summary(user_id, days=7, today=None):
+    """One-line description of the last `days` days for the chat prompt, or None without data"""
+    today = today or datetime.utcnow().date()
+    rows = daily_rollups(user_id, today - timedelta(days=days - 1), today)
+    if not rows:
+        return None
+    days_with_level = {
+        level: sum(1 for row in rows if getattr(row, f"{level}_count"))
+        for level in LEVEL_SCORES
+    }
+    count = sum(row.count for row in rows)
+    average = sum(row.score_sum for row in rows) / count
+    felt = ", ".join(
+        f"{level} on {n} day{'s' if n != 1 else ''}"
+        for level, n in sorted(days_with_level.items(), key=lambda item: -item[1]) if n
+    )
+    return (
+        f"Logged moods on {len(rows)} of the last {days} days "
+        f"(average {average:.1f}/5): felt {felt}."
+    )
@@ -0,0 +1,133 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from sqlalchemy import Integer, cast, func, select
+from backend.models.user import db, MoodEntry, MoodDailyRollup, MoodWeeklyRollup
+from backend.services.mood_rollups import (
+    LEVEL_SCORES, level_score, daily_rollups, rollup_summary, week_start
+)
+
+PERIODS = ('day', 'week', 'month')
+# Range covered when the caller gives no start date
+DEFAULT_SPAN_DAYS = {'day': 30, 'week': 7 * 12, 'month': 365}
+
+
+def _day_number(column, dialect):
+    """Consecutive integers for consecutive calendar days"""
+    if dialect == 'sqlite':
+        return cast(func.julianday(column), Integer)
+    if dialect == 'mysql':
+        return func.to_days(column)
+    return cast(func.extract('epoch', column) / 86400, Integer)
+
+
+def _sum_rows(rows):
+    """Add up rollup rows into one row-like object"""
+    total = SimpleNamespace(count=0, score_sum=0, **{f"{level}_count": 0 for level in LEVEL_SCORES})
+    for row in rows:
+        total.count += row.count
+        total.score_sum += row.score_sum
+        for level in LEVEL_SCORES:
+            name = f"{level}_count"
+            setattr(total, name, getattr(total, name) + getattr(row, name))
+    return total
+
+
+def mood_buckets(user_id, period, start_day, end_day):
+    """Per-period summaries read from the rollup tables (inclusive day range)"""
+    if period == 'week':
+        rows = (
+            MoodWeeklyRollup.query
+            .filter(MoodWeeklyRollup.user_id == user_id,
+                    MoodWeeklyRollup.week_start >= week_start(start_day),
+                    MoodWeeklyRollup.week_start <= end_day)
+            .order_by(MoodWeeklyRollup.week_start.asc())
+            .all()
+        )
+        return [dict(start=row.week_start.isoformat(), **rollup_summary(row)) for row in rows]
+
+    rows = daily_rollups(user_id, start_day, end_day)
+    if period == 'day':
+        return [dict(start=row.day.isoformat(), **rollup_summary(row)) for row in rows]
+
+    months = defaultdict(list)
+    for row in rows:
+        months[row.day.replace(day=1)].append(row)
+    return [
+        dict(start=month.isoformat(), **rollup_summary(_sum_rows(month_rows)))
+        for month, month_rows in sorted(months.items())
+    ]
+
+
+def mood_streaks(user_id, today=None):
+    """Current and longest run of consecutive days with at least one mood (gaps and islands)"""
+    dialect = db.engine.dialect.name
+    day = _day_number(MoodDailyRollup.day, dialect).label('d')
+    days = select(day).where(MoodDailyRollup.user_id == user_id).cte('days')
+    islands = select(
+        days.c.d, (days.c.d - func.row_number().over(order_by=days.c.d)).label('grp')
+    ).cte('islands')
+    streaks = select(
+        func.max(islands.c.d).label('last_day'), func.count().label('length')
+    ).group_by(islands.c.grp).cte('streaks')
+
+    longest, latest = db.session.execute(
+        select(
+            func.max(streaks.c.length),
+            select(streaks.c.length).order_by(streaks.c.last_day.desc()).limit(1).scalar_subquery()
+        )
+    ).one()
+    last_day = db.session.execute(
+        select(func.max(MoodDailyRollup.day)).where(MoodDailyRollup.user_id == user_id)
+    ).scalar()
+
+    today = today or datetime.utcnow().date()
+    # A streak is still alive until a full day passes without a log
+    active = last_day is not None and last_day >= today - timedelta(days=1)
+    return {
+        'current': (latest or 0) if active else 0,
+        'longest': longest or 0,
+        'last_logged': last_day.isoformat() if last_day else None
+    }
+
+
+def last_n_summary(user_id, n):
+    recent = (
+        select(MoodEntry.level.label('level'), level_score().label('score'))
+        .where(MoodEntry.user_id == user_id)
+        .order_by(MoodEntry.timestamp.desc())
+        .limit(n)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(recent.c.level, func.count(), func.sum(recent.c.score)).group_by(recent.c.level)
+    ).all()
+
+    total = SimpleNamespace(count=0, score_sum=0, **{f"{level}_count": 0 for level in LEVEL_SCORES})
+    for level, count, scores in rows:
+        total.count += count
+        total.score_sum += scores or 0
+        if level in LEVEL_SCORES:
+            setattr(total, f"{level}_count", count)
+    return dict(n=n, **rollup_summary(total))
+
+
+def mood_trends(user_id, period='day', start=None, end=None, last_n=7):
+    """Aggregated mood history; the size depends on the range, not on how much was logged"""
+    end = end or datetime.combine(datetime.utcnow().date() + timedelta(days=1), datetime.min.time())
+    start = start or end - timedelta(days=DEFAULT_SPAN_DAYS[period])
+    # `end` is exclusive
+    end_day = (end - timedelta(microseconds=1)).date()
+    total = db.session.execute(
+        select(func.coalesce(func.sum(MoodDailyRollup.count), 0))
+        .where(MoodDailyRollup.user_id == user_id)
+    ).scalar()
+    return {
+        'period': period,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'total_entries': total,
+        'buckets': mood_buckets(user_id, period, start.date(), end_day),
+        'streaks': mood_streaks(user_id),
+        'last_n': last_n_summary(user_id, last_n)
+    }
@@ -0,0 +1,137 @@
+import math
+import os
+import re
+
+# Budget for the retrieved context; the system prompt and user message are always sent
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1200"))
+
+# Static instructions kept byte-identical across requests so the provider can cache the prefix
+SYSTEM_PROMPT = (
+    "You are a supportive mental health assistant with expertise in "
+    "psychology and evidence-based therapeutic techniques. "
+    "Be empathetic, encouraging, and helpful. Use the provided context "
+    "to give personalized, professional advice. "
+    "Reference specific psychological principles and evidence-based "
+    "techniques when appropriate. "
+    "Always encourage professional help when needed and provide "
+    "practical, actionable advice."
+)
+
+# None until the first count; False when tiktoken is not installed
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except ImportError:
+            _encoding = False
+    return _encoding
+
+
+def count_tokens(text):
+    """Token count with tiktoken when installed, otherwise a ~4 chars/token estimate"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def _normalize(text):
+    return re.sub(r'\s+', ' ', text).strip().casefold()
+
+
+class PromptBuilder:
+    """Fits ranked, de-duplicated context items into a token budget.
+
+    Sections are filled in the order they are added and items within a
+    section in rank order; an item that does not fit is dropped and smaller
+    items after it still get a chance.
+    """
+
+    def __init__(self, budget=None):
+        self.budget = PROMPT_TOKEN_BUDGET if budget is None else budget
+        self.sections = []
+
+    def add_section(self, name, heading, items):
+        seen = set()
+        unique = []
+        for item in items:
+            key = _normalize(item)
+            if key and key not in seen:
+                seen.add(key)
+                unique.append(item)
+        self.sections.append((name, heading, unique))
+
+    def build(self, user_input):
+        remaining = self.budget
+        usage = {}
+        dropped = 0
+        rendered = []
+
+        for name, heading, items in self.sections:
+            kept = []
+            heading_cost = count_tokens(heading) + 1
+            for item in items:
+                cost = count_tokens(item) + 1
+                if not kept:
+                    cost += heading_cost
+                if cost <= remaining:
+                    kept.append(item)
+                    remaining -= cost
+                else:
+                    dropped += 1
+            if kept:
+                rendered.append(f"{heading}\n" + "\n".join(kept))
+            usage[name] = self.budget - remaining - sum(usage.values())
+
+        context_text = "\n\n".join(rendered) if rendered else "No context available."
+        user_content = (
+            f"Context:\n{context_text}\n"
+            "---\n"
+            f"User Message: {user_input}\n"
+            "---\n"
+            "Provide a helpful, personalized response based on the psychology "
+            "knowledge and user context above:"
+        )
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_content},
+        ]
+
+        usage["system"] = count_tokens(SYSTEM_PROMPT)
+        usage["user_message"] = count_tokens(user_content) - sum(
+            usage[name] for name, _, _ in self.sections
+        )
+        usage["total"] = usage["system"] + count_tokens(user_content)
+        usage["budget"] = self.budget
+        usage["dropped_items"] = dropped
+        return messages, usage
+
+
+def build_prompt(user_input, contexts, psychology_blocks, budget=None, mood_summary=None, mood_alerts=None):
+    """Chat messages for one turn plus a per-section token report.
+
+    The mood trend summary ranks first, then recent mood alerts, then mood
+    history, then psychology knowledge; full topic blocks rank ahead of
+    one-line related topics. A related topic is skipped when the same topic
+    already has a full block.
+    """
+    builder = PromptBuilder(budget=budget)
+    builder.add_section("mood_trend", "Recent Mood Trend:", [mood_summary] if mood_summary else [])
+    builder.add_section("mood_alerts", "Recent Mood Concerns:", mood_alerts or [])
+    builder.add_section("mood_history", "User's Mood History:", contexts)
+
+    direct_topics = {topic for topic, kind, _ in psychology_blocks if kind == 'direct'}
+    ranked = (
+        [lines for topic, kind, lines in psychology_blocks if kind == 'direct']
+        + [lines for topic, kind, lines in psychology_blocks
+           if kind == 'related' and topic not in direct_topics]
+    )
+    builder.add_section("psychology", "Psychology Knowledge:", ["\n".join(lines) for lines in ranked])
+    return builder.build(user_input)
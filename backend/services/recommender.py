@@ -1,17 +1,51 @@
 from backend.utils.bm25 import bm25_search
 from backend.utils.auth import get_embedding
 from backend.utils.pinecone import query_similar
+from backend.utils.stage_executor import run_stages
+from backend.utils.singleflight import get_group, normalize_key_text
+
+# Duplicate submissions for the same user and query share one retrieval
+retrieval_flight = get_group("retrieval")
+
+
+def vector_search(user_id, query_text, top_k=5):
+    embedding = get_embedding(query_text)
+    vector_matches = query_similar(user_id, embedding, top_k=top_k)
+    return [
+        {"id": m.get("id", ""), "text": m.get("metadata", {}).get("text", ""), "score": m.get("score", 0.0)}
+        for m in vector_matches
+    ]
+
+
+def gather_context(user_id, query_text, extra_stages=None, deadline=None):
+    """Run BM25, vector search and any extra stages concurrently under one deadline.
+
+    Returns the merged mood contexts and the StageRun, so callers can pick up
+    the results of their extra stages and the per-stage timings.
+    """
+    stages = {
+        "bm25": lambda: bm25_search(user_id, query_text),
+        "vector": lambda: vector_search(user_id, query_text),
+    }
+    stages.update(extra_stages or {})
+
+    run = run_stages(stages, deadline=deadline)
+    for name, error in run.errors.items():
+        print(f"Context retrieval error in {name}: {error}")
+    if run.timed_out:
+        print(f"Context retrieval stages missed deadline: {', '.join(run.timed_out)}")
+
+    contexts = merge_results(run.get("bm25") or [], run.get("vector") or [])
+    return contexts, run
+
 
 def retrieve_context(user_id, query_text):
     try:
-        embedding = get_embedding(query_text)
-        bm25_docs = bm25_search(user_id, query_text)
-        vector_matches = query_similar(user_id, embedding)
-        vector_hits = [
-            {"id": m.get("id", ""), "text": m.get("metadata", {}).get("text", ""), "score": m.get("score", 0.0)}
-            for m in vector_matches
-        ]
-        return merge_results(bm25_docs, vector_hits)
+        contexts, _ = retrieval_flight.do(
+            (user_id, "retrieve", normalize_key_text(query_text)),
+            gather_context, user_id, query_text
+        )
+        return contexts
     except Exception as e:
         print(f"Context retrieval error: {e}")
         return []
@@ -19,11 +53,11 @@ def retrieve_context(user_id, query_text):
 def merge_results(bm25_docs, vector_hits):
     doc_set = set()
     combined = []
-    
+
     for doc in (bm25_docs + vector_hits):
         doc_id = doc.get('id', '')
         if doc_id not in doc_set:
             doc_set.add(doc_id)
             combined.append(doc.get('text', ''))
-    
-    return combined[:5]
\ No newline at end of file
+
+    return combined[:5]
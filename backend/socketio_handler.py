@@ -166,6 +166,32 @@ def register_handlers(socketio_instance):
             }
         }, room=f'coaching_session_{session_id}')
 
+    @socketio.on('send_chat_message')
+    def handle_chat_message(data):
+        """Stream an AI chat reply token by token to the sender"""
+        from backend.services.chat_service import stream_response, persist_chat_exchange
+        from backend.models.user import log_chat
+
+        session_data = get_user_session()
+        user_id = session_data.get('user_id')
+        message = (data or {}).get('message', '')
+        
+        if not user_id or not message.strip():
+            emit('error', {'message': 'Invalid message data'})
+            return
+        
+        parts = []
+        for token in stream_response(user_id, message):
+            parts.append(token)
+            emit('chat_token', {'token': token})
+            socketio.sleep(0)  # Let the server flush each token
+        
+        # Persist the full reply once the stream is complete
+        reply = ''.join(parts).strip()
+        persist_chat_exchange(user_id, message, reply)
+        log_chat(user_id, message, reply)
+        emit('chat_complete', {'response': reply})
+
     @socketio.on('join_community')
     def handle_join_community():
         """Join the general community room"""
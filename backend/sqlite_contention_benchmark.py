@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+SQLite write-contention benchmark.
+
+Hammers the write endpoints (mood logging, post likes, comments and chat
+messages) from many concurrent workers against a scratch SQLite database,
+once with SQLite's defaults and once with the tuned connection profile, and
+reports throughput, latency and "database is locked" errors for each.
+
+    python backend/sqlite_contention_benchmark.py [--workers 32] [--requests 50] [--greenlets]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+# Greenlet mode must patch the stdlib before anything else imports it
+if "--greenlets" in sys.argv:
+    import eventlet
+    eventlet.monkey_patch()
+
+# Add parent directory to path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PARENT_DIR = os.path.dirname(CURRENT_DIR)
+if PARENT_DIR not in sys.path:
+    sys.path.append(PARENT_DIR)
+
+os.environ["INDEX_WORKER_IN_PROCESS"] = "0"
+os.environ["WARMUP_ON_START"] = "0"
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from backend.config import Config
+from backend.models.user import db, User, CommunityPost, ChatSession
+from backend.app import create_app
+
+
+def build_app(path, tuned):
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+    Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+    Config.SQLALCHEMY_BINDS = {}
+    Config.SQLITE_TUNING = tuned
+    Config.RATELIMIT_ENABLED = False
+    app, _ = create_app()
+    return app
+
+
+def seed(app, workers):
+    """One user per worker, plus a shared post and a chat session per user"""
+    with app.app_context():
+        users = [
+            User(email=f"bench{i}@example.com", password_hash="-", display_name=f"Bench {i}")
+            for i in range(workers)
+        ]
+        db.session.add_all(users)
+        db.session.flush()
+        post = CommunityPost(user_id=users[0].id, title="Benchmark", content="Shared post")
+        db.session.add(post)
+        sessions = [ChatSession(user_id=user.id, title="Benchmark", date=date.today()) for user in users]
+        db.session.add_all(sessions)
+        db.session.commit()
+        return post.id, [
+            ({"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}, session.id)
+            for user, session in zip(users, sessions)
+        ]
+
+
+def write_ops(post_id, session_id):
+    """The mix of writes a worker cycles through"""
+    return [
+        ("POST", "/api/user/moods", {"level": "okay", "note": "benchmark entry"}),
+        ("POST", f"/api/community/posts/{post_id}/like", None),
+        ("DELETE", f"/api/community/posts/{post_id}/like", None),
+        ("POST", f"/api/community/posts/{post_id}/comments", {"content": "benchmark comment"}),
+        ("POST", f"/api/chat/sessions/{session_id}/messages", {"content": "benchmark message"}),
+    ]
+
+
+def run_profile(name, tuned, args):
+    path = os.path.join(tempfile.mkdtemp(prefix="sqlite-bench-"), "bench.db")
+    app = build_app(path, tuned)
+    post_id, identities = seed(app, args.workers)
+
+    lock_errors = [0]
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "handle_error")
+    def count_lock_errors(context):
+        if "database is locked" in str(context.original_exception):
+            lock_errors[0] += 1
+
+    latencies = []
+    failures = [0]
+    results_lock = threading.Lock()
+
+    def worker(headers, session_id):
+        client = app.test_client()
+        ops = write_ops(post_id, session_id)
+        for i in range(args.requests):
+            method, url, body = ops[i % len(ops)]
+            started = time.perf_counter()
+            try:
+                response = client.open(url, method=method, json=body, headers=headers)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            elapsed = time.perf_counter() - started
+            with results_lock:
+                latencies.append(elapsed)
+                failures[0] += failed
+
+    started = time.perf_counter()
+    if args.greenlets:
+        pool = eventlet.GreenPool(args.workers)
+        for headers, session_id in identities:
+            pool.spawn_n(worker, headers, session_id)
+        pool.waitall()
+    else:
+        threads = [threading.Thread(target=worker, args=identity) for identity in identities]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        journal_mode = db.session.execute(db.text("PRAGMA journal_mode")).scalar()
+        db.session.remove()
+        db.engine.dispose()
+
+    latencies.sort()
+    return {
+        "profile": name,
+        "journal_mode": journal_mode,
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "failed": failures[0],
+        "lock_errors": lock_errors[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure SQLite write contention before and after tuning")
+    parser.add_argument("--workers", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=50, help="Write requests per client")
+    parser.add_argument("--greenlets", action="store_true", help="Use eventlet greenlets instead of threads")
+    parser.add_argument("--profile", choices=["default", "tuned", "both"], default="both")
+    args = parser.parse_args()
+
+    profiles = [("default", False), ("tuned", True)]
+    if args.profile != "both":
+        profiles = [p for p in profiles if p[0] == args.profile]
+
+    mode = "greenlets" if args.greenlets else "threads"
+    print(f"{args.workers} {mode} x {args.requests} write requests")
+    for name, tuned in profiles:
+        r = run_profile(name, tuned, args)
+        print(f"{r['profile']:>8} ({r['journal_mode']}): {r['requests']} requests in {r['seconds']:.2f}s "
+              f"= {r['throughput']:.1f} req/s, p50 {r['p50_ms']:.1f}ms, p95 {r['p95_ms']:.1f}ms, "
+              f"{r['failed']} failed, {r['lock_errors']} lock errors")
+
+
+if __name__ == '__main__':
+    main()
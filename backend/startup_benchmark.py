@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the API.
+
+Starts a fresh interpreter per run and measures how long importing
+backend.app, create_app() and the first request take. Exits non-zero when
+the median total exceeds the budget, so CI catches startup regressions.
+
+    python backend/startup_benchmark.py [--runs 5] [--budget-ms 2500] [--path /api/health]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Add parent directory to path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PARENT_DIR = os.path.dirname(CURRENT_DIR)
+
+# Runs in a child interpreter so every measurement starts with an empty module cache
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {parent!r})
+started = time.perf_counter()
+import backend.app
+imported = time.perf_counter()
+app, _ = backend.app.create_app()
+created = time.perf_counter()
+response = app.test_client().get({path!r})
+served = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (served - created) * 1000,
+    "total_ms": (served - started) * 1000,
+    "status": response.status_code,
+}}))
+"""
+
+PHASES = ("import_ms", "create_app_ms", "first_request_ms", "total_ms")
+
+
+def run_probe(path, env):
+    code = PROBE.format(parent=PARENT_DIR, path=path)
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True, text=True, env=env, cwd=PARENT_DIR
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{result.stderr}")
+    # The app prints while starting; the measurements are the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(env, limit):
+    """Top cumulative import times from `python -X importtime`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.app"],
+        capture_output=True, text=True, env=env, cwd=PARENT_DIR
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), module.strip()))
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API cold-start time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure")
+    parser.add_argument("--path", default="/api/health", help="Endpoint used for the first request")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "2500")),
+                        help="Maximum median total startup time")
+    parser.add_argument("--imports", type=int, default=0, help="Also list the N slowest top-level imports")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    # Warm-up threads would compete with the measured startup
+    env["WARMUP_ON_START"] = "0"
+
+    samples = [run_probe(args.path, env) for _ in range(args.runs)]
+    for phase in PHASES:
+        values = [sample[phase] for sample in samples]
+        print(f"{phase:>18}: median {statistics.median(values):8.1f}  "
+              f"min {min(values):8.1f}  max {max(values):8.1f}")
+    print(f"First request status: {samples[-1]['status']}")
+
+    if args.imports:
+        print("Slowest imports (cumulative ms):")
+        for cumulative, module in slowest_imports(env, args.imports):
+            print(f"  {cumulative / 1000:8.1f}  {module}")
+
+    total = statistics.median(sample["total_ms"] for sample in samples)
+    if total > args.budget_ms:
+        print(f"FAIL: median startup {total:.1f}ms exceeds budget {args.budget_ms:.1f}ms")
+        sys.exit(1)
+    print(f"OK: median startup {total:.1f}ms within budget {args.budget_ms:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
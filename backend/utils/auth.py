@@ -1,19 +1,88 @@
 import os
-from openai import OpenAI
+from backend.utils.embeddings import embedding_cache, EMBEDDING_MODEL, EMBEDDING_DIMENSION
+from backend.utils.resilience import get_breaker, CircuitOpenError
+from backend.utils.singleflight import get_group
+
+EMBEDDING_TIMEOUT = float(os.getenv("OPENAI_EMBEDDING_TIMEOUT_SECONDS", "10"))
+embedding_breaker = get_breaker("openai-embeddings", slow_call_seconds=EMBEDDING_TIMEOUT)
+# Bulk requests (index worker, reindex runs) get a longer timeout and their own breaker, so a
+# slow large batch never opens the breaker that chat's single embeddings go through
+BATCH_EMBEDDING_TIMEOUT = EMBEDDING_TIMEOUT * 3
+batch_embedding_breaker = get_breaker("openai-embeddings-batch", slow_call_seconds=BATCH_EMBEDDING_TIMEOUT)
+# Identical texts embedded at the same moment share one request
+embedding_flight = get_group("embedding")
+
+_client = None
+
+
+def _get_client(api_key):
+    # Reuse one client (and its connection pool) instead of one per call
+    # The SDK is imported here rather than at module load to keep worker boot fast
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=api_key)
+    return _client
+
+
+def _fetch_embedding(api_key, text):
+    client = _get_client(api_key)
+    response = embedding_breaker.call(
+        client.embeddings.create,
+        model=EMBEDDING_MODEL,
+        input=text,
+        timeout=EMBEDDING_TIMEOUT
+    )
+    embedding = response.data[0].embedding
+    embedding_cache.set(EMBEDDING_MODEL, text, embedding)
+    return embedding
+
 
 def get_embedding(text):
+    cached = embedding_cache.get(EMBEDDING_MODEL, text)
+    if cached is not None:
+        return cached
+
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         print("Warning: OPENAI_API_KEY not found. Using dummy embedding.")
-        return [0.0] * 1536
-    
+        return [0.0] * EMBEDDING_DIMENSION
+
     try:
-        client = OpenAI(api_key=api_key)
-        response = client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=text
-        )
-        return response.data[0].embedding
+        return embedding_flight.do((EMBEDDING_MODEL, text), _fetch_embedding, api_key, text)
+    except CircuitOpenError:
+        return [0.0] * EMBEDDING_DIMENSION
     except Exception as e:
         print(f"Embedding error: {e}")
-        return [0.0] * 1536
+        return [0.0] * EMBEDDING_DIMENSION
+
+
+def get_embeddings(texts, batch_size=100):
+    """Embed many texts, sending up to batch_size uncached texts per request.
+
+    Unlike get_embedding this raises on failure, so bulk callers can retry
+    instead of storing dummy vectors.
+    """
+    results = [embedding_cache.get(EMBEDDING_MODEL, text) for text in texts]
+    missing = [i for i, vector in enumerate(results) if vector is None]
+    if not missing:
+        return results
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY not found, cannot embed texts")
+
+    client = _get_client(api_key)
+    for start in range(0, len(missing), batch_size):
+        positions = missing[start:start + batch_size]
+        response = batch_embedding_breaker.call(
+            client.embeddings.create,
+            model=EMBEDDING_MODEL,
+            input=[texts[i] for i in positions],
+            timeout=BATCH_EMBEDDING_TIMEOUT
+        )
+        for item in response.data:
+            i = positions[item.index]
+            results[i] = item.embedding
+            embedding_cache.set(EMBEDDING_MODEL, texts[i], item.embedding)
+    return results
@@ -1,54 +1,213 @@
-from rank_bm25 import BM25Okapi
+import math
+import os
 import re
+import heapq
+import threading
+from collections import Counter, OrderedDict, defaultdict
 from backend.models.user import MoodEntry
 
-class BM25Search:
-    def __init__(self):
-        self.bm25 = None
-        self.documents = []
+# Same limit the per-request rebuild used: only the most recent moods are searchable
+MAX_DOCS_PER_USER = int(os.getenv("BM25_MAX_DOCS_PER_USER", "200"))
+MAX_CACHED_USERS = int(os.getenv("BM25_MAX_CACHED_USERS", "500"))
 
-    def build_index(self, documents):
-        self.documents = documents
-        tokenized_docs = [self.tokenize(doc) for doc in documents]
-        self.bm25 = BM25Okapi(tokenized_docs)
 
-    def tokenize(self, text):
-        return re.findall(r'\b\w+\b', text.lower())
+def tokenize(text):
+    return re.findall(r'\b\w+\b', text.lower())
+
+
+def mood_document(level, note):
+    pieces = [p for p in [level or "", note or ""] if p]
+    return " | ".join(pieces) if pieces else None
+
+
+class UserBM25Index:
+    """Tokenized mood documents and term statistics for a single user.
+
+    Scoring follows BM25Okapi from rank_bm25 so results match the old
+    rebuild-per-request behaviour, but documents can be added and removed
+    without re-tokenizing the whole corpus.
+    """
+
+    k1 = 1.5
+    b = 0.75
+    epsilon = 0.25
+
+    def __init__(self, max_docs=MAX_DOCS_PER_USER):
+        self.max_docs = max_docs
+        self.documents = {}  # doc_id -> (text, term_freqs, length, sort_key)
+        self.doc_freqs = Counter()
+        self.total_length = 0
+        self._idf = None
+
+    def __len__(self):
+        return len(self.documents)
+
+    def copy(self):
+        clone = UserBM25Index(max_docs=self.max_docs)
+        clone.documents = dict(self.documents)
+        clone.doc_freqs = Counter(self.doc_freqs)
+        clone.total_length = self.total_length
+        clone._idf = self._idf
+        return clone
+
+    def add(self, doc_id, text, sort_key):
+        self.remove(doc_id)
+        tokens = tokenize(text)
+        term_freqs = Counter(tokens)
+        self.documents[doc_id] = (text, term_freqs, len(tokens), sort_key)
+        self.doc_freqs.update(term_freqs.keys())
+        self.total_length += len(tokens)
+        self._idf = None
+
+        if len(self.documents) > self.max_docs:
+            oldest = min(self.documents, key=lambda d: self.documents[d][3])
+            self.remove(oldest)
+
+    def remove(self, doc_id):
+        entry = self.documents.pop(doc_id, None)
+        if entry is None:
+            return
+        _, term_freqs, length, _ = entry
+        for term in term_freqs:
+            self.doc_freqs[term] -= 1
+            if self.doc_freqs[term] <= 0:
+                del self.doc_freqs[term]
+        self.total_length -= length
+        self._idf = None
+
+    def _compute_idf(self):
+        # Recomputed lazily once per change rather than on every query
+        corpus_size = len(self.documents)
+        idf = {}
+        negative = []
+        idf_sum = 0.0
+        for term, freq in self.doc_freqs.items():
+            value = math.log(corpus_size - freq + 0.5) - math.log(freq + 0.5)
+            idf[term] = value
+            idf_sum += value
+            if value < 0:
+                negative.append(term)
+        if idf:
+            eps = self.epsilon * idf_sum / len(idf)
+            for term in negative:
+                idf[term] = eps
+        self._idf = idf
+        return idf
 
     def search(self, query, top_k=5):
-        if not self.bm25:
+        if not self.documents:
             return []
 
-        tokenized_query = self.tokenize(query)
-        scores = self.bm25.get_scores(tokenized_query)
-        top_indices = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:top_k]
+        idf = self._idf if self._idf is not None else self._compute_idf()
+        avgdl = self.total_length / len(self.documents)
+        query_terms = tokenize(query)
+
+        scored = []
+        for doc_id, (text, term_freqs, length, sort_key) in self.documents.items():
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / avgdl) if avgdl else self.k1
+            for term in query_terms:
+                tf = term_freqs.get(term)
+                if tf:
+                    score += idf.get(term, 0.0) * (tf * (self.k1 + 1) / (tf + norm))
+            scored.append((score, sort_key, doc_id, text))
 
+        top = heapq.nlargest(top_k, scored, key=lambda item: (item[0], item[1]))
         return [
             {
-                "id": str(i),
-                "text": self.documents[i],
-                "score": float(scores[i])
+                "id": doc_id,
+                "text": text,
+                "score": float(score)
             }
-            for i in top_indices
+            for score, _, doc_id, text in top
         ]
 
-bm25_searcher = BM25Search()
+
+class BM25IndexManager:
+    """Per-user BM25 indexes kept in memory with LRU eviction.
+
+    A cached index is never changed in place: writers update a copy and swap
+    it in, so searches score the index they looked up without holding the lock.
+    """
+
+    def __init__(self, max_users=MAX_CACHED_USERS, max_docs=MAX_DOCS_PER_USER):
+        self.max_users = max_users
+        self.max_docs = max_docs
+        self._indexes = OrderedDict()
+        self._versions = defaultdict(int)
+        self._lock = threading.RLock()
+
+    def _load(self, user_id):
+        entries = (
+            MoodEntry.query.filter_by(user_id=user_id)
+            .order_by(MoodEntry.timestamp.desc())
+            .limit(self.max_docs)
+            .all()
+        )
+        user_index = UserBM25Index(max_docs=self.max_docs)
+        for e in entries:
+            text = mood_document(e.level, e.note)
+            if text:
+                user_index.add(str(e.id), text, (e.timestamp, e.id))
+        return user_index
+
+    def _get(self, user_id):
+        with self._lock:
+            user_index = self._indexes.get(user_id)
+            if user_index is not None:
+                self._indexes.move_to_end(user_id)
+                return user_index
+            version = self._versions[user_id]
+
+        user_index = self._load(user_id)
+
+        with self._lock:
+            # A mood changed while we were loading; serve this copy but don't cache it
+            if self._versions[user_id] != version:
+                return user_index
+            self._indexes[user_id] = user_index
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+        return user_index
+
+    def search(self, user_id, query, top_k=5):
+        return self._get(user_id).search(query, top_k=top_k)
+
+    def add_mood(self, mood):
+        """Add or replace a mood entry in the owner's index if it is cached"""
+        with self._lock:
+            self._versions[mood.user_id] += 1
+            user_index = self._indexes.get(mood.user_id)
+            if user_index is None:
+                return
+            user_index = user_index.copy()
+            text = mood_document(mood.level, mood.note)
+            if text:
+                user_index.add(str(mood.id), text, (mood.timestamp, mood.id))
+            else:
+                user_index.remove(str(mood.id))
+            self._indexes[mood.user_id] = user_index
+
+    def remove_mood(self, user_id, mood_id):
+        with self._lock:
+            self._versions[user_id] += 1
+            user_index = self._indexes.get(user_id)
+            if user_index is not None:
+                user_index = user_index.copy()
+                user_index.remove(str(mood_id))
+                self._indexes[user_id] = user_index
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._indexes.clear()
+            else:
+                self._versions[user_id] += 1
+                self._indexes.pop(user_id, None)
+
+
+bm25_index = BM25IndexManager()
+
 
 def bm25_search(user_id, query, top_k=5):
-    entries = (
-        MoodEntry.query.filter_by(user_id=user_id)
-        .order_by(MoodEntry.timestamp.desc())
-        .limit(200)
-        .all()
-    )
-    documents = []
-    for e in entries:
-        pieces = [p for p in [e.level or "", e.note or ""] if p]
-        if pieces:
-            documents.append(" | ".join(pieces))
-
-    if not documents:
-        return []
-
-    bm25_searcher.build_index(documents)
-    return bm25_searcher.search(query, top_k=top_k)
\ No newline at end of file
+    return bm25_index.search(user_id, query, top_k=top_k)
@@ -1,6 +1,79 @@
+import atexit
+import os
+from flask import g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# Bind key of the read replica in SQLALCHEMY_BINDS
+REPLICA_BIND = "replica"
+
+
+def use_replica(enabled=True):
+    """Send this request's reads to the replica bind (if one is configured)"""
+    g.db_use_replica = enabled
+
+
+def _replica_requested():
+    return has_request_context() and g.get("db_use_replica", False)
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica while the request asked for it.
+
+    Flushes (and therefore every INSERT/UPDATE/DELETE) always go to the
+    primary, as does everything when no replica bind is configured.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _replica_requested():
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+# Applied to every new SQLite connection; WAL lets readers proceed while one writer commits
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Negative cache_size is in KiB
+    "cache_size": -int(os.getenv("SQLITE_CACHE_KB", "65536")),
+    "temp_store": "MEMORY",
+}
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def _optimize_sqlite(engines):
+    for engine in engines:
+        try:
+            with engine.connect() as connection:
+                connection.exec_driver_sql("PRAGMA optimize")
+        except Exception as e:
+            print(f"SQLite optimize failed: {e}")
+
+
+def configure_sqlite(app):
+    """Tune every SQLite engine of the app on connect and run PRAGMA optimize at exit"""
+    if not app.config.get("SQLITE_TUNING", True):
+        return
+    with app.app_context():
+        engines = [engine for engine in db.engines.values() if engine.dialect.name == "sqlite"]
+    for engine in engines:
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+    if engines:
+        atexit.register(_optimize_sqlite, engines)
+
 
 # Singleton SQLAlchemy object
 # To be initialized in app context
 
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy(session_options={"class_": RoutingSession})
@@ -1,2 +1,138 @@
-# This file is for embedding utilities only
+# Embedding cache shared by get_embedding and anything else that embeds text
 # The recommender logic is in services/recommender.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+EMBEDDING_DIMENSION = 1536
+
+_DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "instance", "embedding_cache.db"
+)
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache.
+
+    Vectors are keyed by a hash of (model, text). Lookups hit a bounded
+    in-process LRU first and fall back to a local SQLite file, so vectors
+    survive restarts and redeploys on the same volume.
+    """
+
+    def __init__(self, path=None, max_items=2048):
+        self.path = path
+        self.max_items = max_items
+        self._memory = OrderedDict()
+        # Guards the LRU and counters only; the SQLite tier is read and written outside it
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._schema_ready = False
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model, text):
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _disk(self):
+        """This thread's connection to the disk tier, opened on first use"""
+        if not self.path:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=5)
+                if not self._schema_ready:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS embeddings ("
+                        "key TEXT PRIMARY KEY, model TEXT NOT NULL, "
+                        "vector BLOB NOT NULL, created_at REAL NOT NULL)"
+                    )
+                    conn.commit()
+                    self._schema_ready = True
+                self._local.conn = conn
+            except sqlite3.Error as e:
+                print(f"Embedding cache disk tier disabled: {e}")
+                self.path = None
+                return None
+        return conn
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def get(self, model, text):
+        key = self.make_key(model, text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return list(vector)
+
+        row = None
+        conn = self._disk()
+        if conn is not None:
+            try:
+                row = conn.execute(
+                    "SELECT vector FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"Embedding cache read error: {e}")
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            vector = array("f", row[0]).tolist()
+            self._remember(key, vector)
+            self.hits_disk += 1
+            return list(vector)
+
+    def set(self, model, text, vector):
+        key = self.make_key(model, text)
+        with self._lock:
+            self._remember(key, list(vector))
+        conn = self._disk()
+        if conn is not None:
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, model, vector, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, model, array("f", vector).tobytes(), time.time())
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Embedding cache write error: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits_memory + self.hits_disk + self.misses
+            return {
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "hit_rate": round((self.hits_memory + self.hits_disk) / lookups, 4) if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "disk_enabled": bool(self.path)
+            }
+
+
+# An empty EMBEDDING_CACHE_PATH (as copied from env.example) means the default file;
+# EMBEDDING_CACHE_DISK=0 keeps the cache in memory only
+embedding_cache = EmbeddingCache(
+    path=(os.getenv("EMBEDDING_CACHE_PATH") or _DEFAULT_CACHE_PATH)
+    if os.getenv("EMBEDDING_CACHE_DISK", "1") == "1" else None,
+    max_items=int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+)
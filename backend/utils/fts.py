@@ -0,0 +1,57 @@
+"""Query and snippet helpers for the full-text indexes (created by migrations 0007 and 0008)"""
+
+import html
+import re
+
+# Control characters mark matches in raw snippets; render_snippet() turns them into <mark>
+# after escaping, so post text can never inject markup
+MARK_START = "\x02"
+MARK_END = "\x03"
+MAX_QUERY_TERMS = 10
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def query_terms(text):
+    """The words of a search box query, lowercased, at most MAX_QUERY_TERMS"""
+    return [term.lower() for term in _TERM.findall(text or "")][:MAX_QUERY_TERMS]
+
+
+def fts5_query(text):
+    """A MATCH expression that ANDs the quoted terms; the last one also matches as a prefix.
+
+    Quoting keeps user input from being parsed as FTS5 syntax (NEAR, column
+    filters, unbalanced quotes). Returns None when there is nothing to search.
+    """
+    terms = query_terms(text)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def fts5_available(connection):
+    if connection.dialect.name != "sqlite":
+        return False
+    return bool(connection.exec_driver_sql(
+        "SELECT 1 FROM pragma_compile_options WHERE compile_options = 'ENABLE_FTS5'"
+    ).first())
+
+
+def render_snippet(raw):
+    """HTML-escaped snippet with the matches wrapped in <mark>"""
+    return html.escape(raw or "").replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+
+def highlight_excerpt(text, terms, width=160):
+    """Raw snippet for backends without one: the text around the first matching term, terms marked"""
+    text = text or ""
+    if not terms:
+        return text[:width]
+    pattern = re.compile(r"\b(" + "|".join(re.escape(term) for term in terms) + r")\w*", re.IGNORECASE)
+    match = pattern.search(text)
+    start = max((match.start() if match else 0) - width // 3, 0)
+    excerpt = text[start:start + width]
+    excerpt = pattern.sub(lambda m: f"{MARK_START}{m.group(0)}{MARK_END}", excerpt)
+    return ("…" if start else "") + excerpt + ("…" if start + width < len(text) else "")
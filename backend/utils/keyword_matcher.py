@@ -0,0 +1,70 @@
+from collections import deque
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over a fixed keyword list.
+
+    Matching has the same semantics as `keyword in text.lower()` for every
+    keyword (overlapping and in-word matches included), but scans the text
+    once instead of once per keyword.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(k.lower() for k in keywords))
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+
+        for i, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] = self._out[state] + (i,)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _scan(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                yield out[state]
+
+    def find(self, text):
+        """Set of keywords occurring in text"""
+        found = set()
+        for matches in self._scan(text):
+            found.update(matches)
+        return {self.keywords[i] for i in found}
+
+    def find_ordered(self, text):
+        """Keywords occurring in text, in the order they were given to the matcher"""
+        found = set()
+        for matches in self._scan(text):
+            found.update(matches)
+        return [self.keywords[i] for i in sorted(found)]
+
+    def search(self, text):
+        """True as soon as any keyword occurs in text"""
+        for _ in self._scan(text):
+            return True
+        return False
@@ -1,76 +1,199 @@
 import os
+import threading
+import time
 from dotenv import load_dotenv
+from backend.utils.resilience import get_breaker, CircuitOpenError
 
 load_dotenv()
 
-# Initialize Pinecone only if API key is available
+# Per-request timeout for Pinecone calls; slower calls count against the breaker
+PINECONE_TIMEOUT = float(os.getenv("PINECONE_TIMEOUT_SECONDS", "3"))
+pinecone_breaker = get_breaker("pinecone", slow_call_seconds=PINECONE_TIMEOUT)
+
+# Vector backend: "pinecone", "local", "both", or "auto" (Pinecone when a key is set, local otherwise)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "auto").lower()
+
+# Pinecone is connected lazily on first use so importing this module never touches the network
 pinecone_initialized = False
 index = None
+local_store = None
+_init_lock = threading.Lock()
+_init_failed_at = None
+# After a failed connect, wait this long before trying again
+INIT_RETRY_SECONDS = float(os.getenv("PINECONE_INIT_RETRY_SECONDS", "60"))
 
 def init_pinecone():
-    global pinecone_initialized, index
+    global pinecone_initialized, index, _init_failed_at
     if pinecone_initialized:
-        return
+        return index
     
     api_key = os.getenv("PINECONE_API_KEY")
     
     if not api_key:
-        print("Warning: PINECONE_API_KEY not found. Pinecone features will be disabled.")
-        return
+        return None
     
-    try:
-        # Use the new Pinecone client (serverless)
-        from pinecone import Pinecone
-        pc = Pinecone(api_key=api_key)
-        
-        index_name = "mental-wellness-vectors"
-        
-        # Create index if it doesn't exist (serverless)
-        if index_name not in [idx.name for idx in pc.list_indexes()]:
-            pc.create_index(
-                name=index_name,
-                dimension=1536,
-                metric="cosine",
-                spec={
-                    "serverless": {
-                        "cloud": "aws",
-                        "region": "us-east-1"
+    with _init_lock:
+        if pinecone_initialized:
+            return index
+        if _init_failed_at is not None and time.monotonic() - _init_failed_at < INIT_RETRY_SECONDS:
+            return None
+        try:
+            # Use the new Pinecone client (serverless)
+            from pinecone import Pinecone
+            pc = Pinecone(api_key=api_key)
+            
+            index_name = "mental-wellness-vectors"
+            
+            # Create index if it doesn't exist (serverless)
+            if index_name not in [idx.name for idx in pc.list_indexes()]:
+                pc.create_index(
+                    name=index_name,
+                    dimension=1536,
+                    metric="cosine",
+                    spec={
+                        "serverless": {
+                            "cloud": "aws",
+                            "region": "us-east-1"
+                        }
                     }
-                }
-            )
-        
-        index = pc.Index(index_name)
-        pinecone_initialized = True
-        print("Pinecone initialized successfully (serverless)")
-    except Exception as e:
-        print(f"Warning: Failed to initialize Pinecone: {e}")
-        print("Pinecone features will be disabled.")
+                )
+            
+            index = pc.Index(index_name)
+            pinecone_initialized = True
+            print("Pinecone initialized successfully (serverless)")
+        except Exception as e:
+            _init_failed_at = time.monotonic()
+            print(f"Warning: Failed to initialize Pinecone: {e}")
+            print("Pinecone features will be disabled.")
+    return index
+
+def get_index():
+    """The Pinecone index, connecting on first call; None when unavailable"""
+    if pinecone_initialized:
+        return index
+    return init_pinecone()
+
+def _use_pinecone():
+    if VECTOR_BACKEND in ("pinecone", "both"):
+        return True
+    return VECTOR_BACKEND == "auto" and bool(os.getenv("PINECONE_API_KEY"))
 
-# Initialize on import
-init_pinecone()
+def _use_local():
+    if VECTOR_BACKEND in ("local", "both"):
+        return True
+    return VECTOR_BACKEND == "auto" and not os.getenv("PINECONE_API_KEY")
+
+def get_local_store():
+    global local_store
+    if local_store is None:
+        from backend.utils.vector_store import LocalVectorStore
+        local_store = LocalVectorStore(root=os.getenv("LOCAL_VECTOR_DIR") or None)
+    return local_store
 
 def _namespace_for_user(user_id):
     return f"user-{user_id}"
 
 def upsert_embedding(user_id, embedding, metadata):
-    if not pinecone_initialized or not index:
-        print("Pinecone not available, skipping upsert")
-        return
-    
     # Use mood ID as vector ID, or generate a unique ID if not available
-    vector_id = metadata.get('mood_id', f"mood-{user_id}-{metadata.get('timestamp', 'unknown')}")
+    vector_id = str(metadata.get('mood_id', f"mood-{user_id}-{metadata.get('timestamp', 'unknown')}"))
     ns = _namespace_for_user(user_id)
+
+    if _use_local():
+        try:
+            get_local_store().upsert(vectors=[(vector_id, embedding, metadata)], namespace=ns)
+        except Exception as e:
+            print(f"Error upserting to local vector store: {e}")
+
+    if not _use_pinecone():
+        return
+    index = get_index()
+    if not index:
+        print("Pinecone not available, skipping upsert")
+        return
     
     try:
-        index.upsert(vectors=[(vector_id, embedding, metadata)], namespace=ns)
+        pinecone_breaker.call(
+            index.upsert, vectors=[(vector_id, embedding, metadata)], namespace=ns,
+            _request_timeout=PINECONE_TIMEOUT
+        )
         print(f"Successfully stored vector {vector_id} in Pinecone for user {user_id}")
     except Exception as e:
         print(f"Error upserting to Pinecone: {e}")
 
+def upsert_embeddings(user_id, vectors, batch_size=100):
+    """Bulk upsert of (vector_id, embedding, metadata) tuples into one user's namespace.
+
+    Raises on failure so bulk callers can retry.
+    """
+    ns = _namespace_for_user(user_id)
+    vectors = [(str(vector_id), embedding, metadata) for vector_id, embedding, metadata in vectors]
+
+    if _use_local():
+        get_local_store().upsert(vectors=vectors, namespace=ns)
+
+    if _use_pinecone():
+        index = get_index()
+        if not index:
+            raise RuntimeError("Pinecone not available")
+        for start in range(0, len(vectors), batch_size):
+            pinecone_breaker.call(
+                index.upsert, vectors=vectors[start:start + batch_size], namespace=ns,
+                _request_timeout=PINECONE_TIMEOUT
+            )
+    return len(vectors)
+
+def delete_embeddings(user_id, vector_ids):
+    """Bulk delete from one user's namespace; raises on failure so bulk callers can retry"""
+    ns = _namespace_for_user(user_id)
+    vector_ids = [str(vector_id) for vector_id in vector_ids]
+
+    if _use_local():
+        get_local_store().delete(ids=vector_ids, namespace=ns)
+
+    if _use_pinecone():
+        index = get_index()
+        if not index:
+            raise RuntimeError("Pinecone not available")
+        pinecone_breaker.call(index.delete, ids=vector_ids, namespace=ns, _request_timeout=PINECONE_TIMEOUT)
+    return len(vector_ids)
+
+def delete_embedding(user_id, vector_id):
+    ns = _namespace_for_user(user_id)
+
+    if _use_local():
+        try:
+            get_local_store().delete(ids=[str(vector_id)], namespace=ns)
+        except Exception as e:
+            print(f"Error deleting from local vector store: {e}")
+
+    index = get_index() if _use_pinecone() else None
+    if index:
+        try:
+            pinecone_breaker.call(
+                index.delete, ids=[str(vector_id)], namespace=ns, _request_timeout=PINECONE_TIMEOUT
+            )
+        except Exception as e:
+            print(f"Error deleting from Pinecone: {e}")
+
 def query_similar(user_id, embedding, top_k=5):
-    if not pinecone_initialized or not index:
+    ns = _namespace_for_user(user_id)
+
+    # The local store answers first; in "both" mode Pinecone only backs it up when it is empty
+    if _use_local():
+        matches = get_local_store().query(vector=embedding, top_k=top_k, namespace=ns)
+        if matches or not _use_pinecone():
+            return matches
+
+    index = get_index()
+    if not index:
         print("Pinecone not available, returning empty results")
         return []
-    ns = _namespace_for_user(user_id)
-    result = index.query(vector=embedding, top_k=top_k, include_metadata=True, namespace=ns)
-    return result.get("matches", [])
\ No newline at end of file
+    try:
+        # _request_timeout bounds the HTTP call; the breaker fails fast while Pinecone is unhealthy
+        result = pinecone_breaker.call(
+            index.query, vector=embedding, top_k=top_k, include_metadata=True, namespace=ns,
+            _request_timeout=PINECONE_TIMEOUT
+        )
+    except CircuitOpenError:
+        return []
+    return result.get("matches", [])
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+    def __init__(self, name):
+        super().__init__(f"Circuit '{name}' is open")
+        self.name = name
+
+
+class CircuitBreaker:
+    """Tracks recent outcomes of calls to one dependency and fails fast when it is unhealthy.
+
+    The breaker opens when at least `min_calls` of the last `window` calls
+    were recorded and the share of failures (errors, plus calls slower than
+    `slow_call_seconds`) reaches `failure_rate`. While open every call raises
+    CircuitOpenError immediately. After `open_seconds` a single probe call
+    is let through (half-open): success closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, name, failure_rate=0.5, min_calls=5, window=20,
+                 open_seconds=30.0, slow_call_seconds=None):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self._outcomes = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        print(f"Circuit '{self.name}' opened")
+
+    def allow_request(self):
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self, elapsed=0.0):
+        if self.slow_call_seconds is not None and elapsed > self.slow_call_seconds:
+            self.record_failure(elapsed)
+            return
+        with self._lock:
+            self._latencies.append(elapsed)
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._outcomes.clear()
+                print(f"Circuit '{self.name}' closed")
+            self._outcomes.append(True)
+
+    def record_failure(self, elapsed=0.0):
+        with self._lock:
+            self._latencies.append(elapsed)
+            if self._current_state() == HALF_OPEN:
+                self._trip()
+                return
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if (self._state == CLOSED and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.failure_rate):
+                self._trip()
+
+    def call(self, fn, *args, **kwargs):
+        if not self.allow_request():
+            raise CircuitOpenError(self.name)
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure(time.monotonic() - started)
+            raise
+        self.record_success(time.monotonic() - started)
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            state = self._current_state()
+            calls = len(self._outcomes)
+            latencies = sorted(self._latencies)
+            return {
+                "state": state,
+                "recent_calls": calls,
+                "error_rate": round(self._outcomes.count(False) / calls, 3) if calls else 0.0,
+                "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+                "max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+                "rejected": self._rejected,
+                "retry_in_seconds": round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1)
+                if state == OPEN else 0.0
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name, **kwargs):
+    """Shared breaker per dependency name; kwargs only apply on first creation"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            kwargs.setdefault("open_seconds", float(os.getenv("CIRCUIT_OPEN_SECONDS", "30")))
+            kwargs.setdefault("failure_rate", float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5")))
+            breaker = CircuitBreaker(name, **kwargs)
+            _breakers[name] = breaker
+        return breaker
+
+
+def breaker_states():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
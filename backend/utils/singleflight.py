@@ -0,0 +1,79 @@
+import threading
+from concurrent.futures import Future
+
+
+def normalize_key_text(text):
+    """Collapse whitespace and case so trivially different duplicates share a key"""
+    return " ".join((text or "").split()).casefold()
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one.
+
+    The first caller for a key runs the function; callers arriving with the
+    same key while it is in flight wait on the same future and get its
+    result (or exception). Nothing is cached once the call finishes.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._shared = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            self._calls += 1
+            future = self._futures.get(key)
+            if future is not None:
+                self._shared += 1
+                leader = False
+            else:
+                future = Future()
+                self._futures[key] = future
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._futures.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "shared": self._shared,
+                "in_flight": len(self._futures),
+                "dedupe_rate": round(self._shared / self._calls, 3) if self._calls else 0.0
+            }
+
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+
+def get_group(name):
+    """Shared SingleFlight per operation name"""
+    with _groups_lock:
+        group = _groups.get(name)
+        if group is None:
+            group = SingleFlight(name)
+            _groups[name] = group
+        return group
+
+
+def singleflight_stats():
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {group.name: group.stats() for group in groups}
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+
+DEFAULT_DEADLINE = float(os.getenv("RETRIEVAL_DEADLINE_SECONDS", "3.0"))
+MAX_WORKERS = int(os.getenv("RETRIEVAL_MAX_WORKERS", "8"))
+
+_pool = None
+_pool_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _green_threads_enabled():
+    """True when running under eventlet with threads monkey patched (gunicorn eventlet worker)"""
+    try:
+        from eventlet import patcher
+    except ImportError:
+        return False
+    return patcher.is_monkey_patched("thread")
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="retrieval")
+    return _pool
+
+
+def _spawn(fn):
+    if _green_threads_enabled():
+        import eventlet
+        eventlet.spawn_n(fn)
+    else:
+        _get_pool().submit(fn)
+
+
+def _record(name, status, elapsed_ms):
+    with _stats_lock:
+        stage = _stats.setdefault(name, {
+            "calls": 0, "ok": 0, "timeout": 0, "error": 0,
+            "total_ms": 0.0, "max_ms": 0.0
+        })
+        stage["calls"] += 1
+        stage[status] += 1
+        stage["total_ms"] += elapsed_ms
+        stage["max_ms"] = max(stage["max_ms"], elapsed_ms)
+
+
+def stage_stats():
+    """Aggregated per-stage timings since process start"""
+    with _stats_lock:
+        return {
+            name: dict(
+                stage,
+                total_ms=round(stage["total_ms"], 2),
+                max_ms=round(stage["max_ms"], 2),
+                avg_ms=round(stage["total_ms"] / stage["calls"], 2) if stage["calls"] else 0.0
+            )
+            for name, stage in _stats.items()
+        }
+
+
+class StageRun:
+    """Outcome of one fan-out: results of finished stages plus per-stage timings"""
+
+    def __init__(self):
+        self.results = {}
+        self.timings = {}
+        self.timed_out = []
+        self.errors = {}
+
+    def get(self, name, default=None):
+        return self.results.get(name, default)
+
+
+def run_stages(stages, deadline=None):
+    """Run independent callables concurrently and return whatever finished in time.
+
+    `stages` maps a stage name to a zero-argument callable. Stages still
+    running when the deadline passes are abandoned: their results are
+    dropped and they are reported in `timed_out`.
+    """
+    deadline = DEFAULT_DEADLINE if deadline is None else deadline
+    run = StageRun()
+    if not stages:
+        return run
+
+    app = current_app._get_current_object() if has_app_context() else None
+    lock = threading.Lock()
+    all_done = threading.Event()
+    pending = [len(stages)]
+    started = time.perf_counter()
+
+    def make_task(name, fn):
+        def task():
+            begin = time.perf_counter()
+            try:
+                if app is not None:
+                    with app.app_context():
+                        value = fn()
+                else:
+                    value = fn()
+                status, error = "ok", None
+            except Exception as e:
+                value, status, error = None, "error", e
+            elapsed_ms = (time.perf_counter() - begin) * 1000
+            with lock:
+                # Stages that missed the deadline were already reported as timeouts
+                late = name in run.timed_out
+                if not late:
+                    if status == "ok":
+                        run.results[name] = value
+                    else:
+                        run.errors[name] = str(error)
+                    run.timings[name] = {"status": status, "ms": round(elapsed_ms, 2)}
+                pending[0] -= 1
+                if pending[0] == 0:
+                    all_done.set()
+            if not late:
+                _record(name, status, elapsed_ms)
+        return task
+
+    for name, fn in stages.items():
+        _spawn(make_task(name, fn))
+
+    all_done.wait(timeout=deadline)
+
+    with lock:
+        waited_ms = round((time.perf_counter() - started) * 1000, 2)
+        for name in stages:
+            if name not in run.timings:
+                run.timed_out.append(name)
+                run.timings[name] = {"status": "timeout", "ms": waited_ms}
+    for name in run.timed_out:
+        _record(name, "timeout", waited_ms)
+    return run
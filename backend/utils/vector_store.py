@@ -0,0 +1,196 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+
+_DEFAULT_VECTOR_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "instance", "vectors"
+)
+
+
+class _Namespace:
+    """One namespace: a float32 (capacity, dim) memmap plus ids and metadata"""
+
+    def __init__(self, path, dimension):
+        self.path = path
+        self.dimension = dimension
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.index_path = os.path.join(path, "index.json")
+        self.ids = []
+        self.metadata = []
+        self.positions = {}
+        self.capacity = 0
+        self.matrix = None
+        self.loaded_mtime = None
+        self.load()
+
+    @property
+    def count(self):
+        return len(self.ids)
+
+    def _index_mtime(self):
+        try:
+            return os.stat(self.index_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def load(self):
+        self.loaded_mtime = self._index_mtime()
+        if self.loaded_mtime is None:
+            self.ids, self.metadata, self.positions = [], [], {}
+            self.capacity, self.matrix = 0, None
+            return
+        with open(self.index_path) as f:
+            state = json.load(f)
+        self.ids = state["ids"]
+        self.metadata = state["metadata"]
+        self.capacity = state["capacity"]
+        self.positions = {vector_id: i for i, vector_id in enumerate(self.ids)}
+        self.matrix = np.memmap(
+            self.vectors_path, dtype=np.float32, mode="r+",
+            shape=(self.capacity, self.dimension)
+        ) if self.capacity else None
+
+    def refresh(self):
+        # Another process (e.g. the index worker) may have written since we loaded
+        if self._index_mtime() != self.loaded_mtime:
+            self.load()
+
+    def _ensure_capacity(self, needed):
+        if needed <= self.capacity:
+            return
+        new_capacity = max(64, self.capacity * 2)
+        while new_capacity < needed:
+            new_capacity *= 2
+        os.makedirs(self.path, exist_ok=True)
+        if self.matrix is not None:
+            self.matrix.flush()
+            del self.matrix
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(new_capacity * self.dimension * 4)
+        self.capacity = new_capacity
+        self.matrix = np.memmap(
+            self.vectors_path, dtype=np.float32, mode="r+",
+            shape=(self.capacity, self.dimension)
+        )
+
+    def save(self):
+        if self.matrix is not None:
+            self.matrix.flush()
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "ids": self.ids,
+                "metadata": self.metadata,
+                "capacity": self.capacity,
+                "dimension": self.dimension
+            }, f)
+        os.replace(tmp_path, self.index_path)
+        self.loaded_mtime = self._index_mtime()
+
+    def upsert(self, vector_id, values, metadata):
+        row = np.asarray(values, dtype=np.float32)
+        norm = np.linalg.norm(row)
+        if norm > 0:
+            row = row / norm
+        position = self.positions.get(vector_id)
+        if position is None:
+            self._ensure_capacity(self.count + 1)
+            position = self.count
+            self.ids.append(vector_id)
+            self.metadata.append(metadata)
+            self.positions[vector_id] = position
+        else:
+            self.metadata[position] = metadata
+        self.matrix[position] = row
+
+    def delete(self, vector_id):
+        position = self.positions.pop(vector_id, None)
+        if position is None:
+            return False
+        last = self.count - 1
+        if position != last:
+            # Swap the last row into the hole so rows [0, count) stay dense
+            self.matrix[position] = self.matrix[last]
+            self.ids[position] = self.ids[last]
+            self.metadata[position] = self.metadata[last]
+            self.positions[self.ids[position]] = position
+        self.ids.pop()
+        self.metadata.pop()
+        return True
+
+    def query(self, values, top_k):
+        if not self.count:
+            return []
+        query = np.asarray(values, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        scores = self.matrix[:self.count] @ (query / norm)
+        k = min(top_k, self.count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {
+                "id": self.ids[i],
+                "score": float(scores[i]),
+                "metadata": self.metadata[i]
+            }
+            for i in top
+        ]
+
+
+class LocalVectorStore:
+    """Pinecone-compatible cosine vector store kept on local disk.
+
+    Each namespace is a directory holding a memory-mapped float32 matrix of
+    unit-normalised rows plus a JSON file with ids and metadata, so queries
+    are a single matrix-vector product and need no network.
+    """
+
+    def __init__(self, root=None, dimension=1536, max_open=256):
+        self.root = root or _DEFAULT_VECTOR_DIR
+        self.dimension = dimension
+        self.max_open = max_open
+        self._namespaces = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _namespace(self, namespace):
+        ns = self._namespaces.get(namespace)
+        if ns is None:
+            ns = _Namespace(os.path.join(self.root, namespace), self.dimension)
+            self._namespaces[namespace] = ns
+            while len(self._namespaces) > self.max_open:
+                self._namespaces.popitem(last=False)
+        else:
+            self._namespaces.move_to_end(namespace)
+            ns.refresh()
+        return ns
+
+    def upsert(self, vectors, namespace):
+        """Insert or replace (id, values, metadata) tuples, like Index.upsert"""
+        with self._lock:
+            ns = self._namespace(namespace)
+            for vector_id, values, metadata in vectors:
+                ns.upsert(str(vector_id), values, metadata or {})
+            ns.save()
+        return {"upserted_count": len(vectors)}
+
+    def delete(self, ids, namespace):
+        with self._lock:
+            ns = self._namespace(namespace)
+            deleted = sum(1 for vector_id in ids if ns.delete(str(vector_id)))
+            if deleted:
+                ns.save()
+        return deleted
+
+    def query(self, vector, top_k, namespace):
+        with self._lock:
+            return self._namespace(namespace).query(vector, top_k)
+
+    def count(self, namespace):
+        with self._lock:
+            return self._namespace(namespace).count